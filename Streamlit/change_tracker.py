@@ -0,0 +1,97 @@
+import hashlib
+
+
+def new_digest():
+    """Incremental hasher whose result equals bytes_digest() of everything fed to it."""
+    return hashlib.blake2b(digest_size=16)
+
+
+def bytes_digest(data):
+    """Short digest of raw bytes."""
+    digest = new_digest()
+    digest.update(data)
+    return digest.digest()
+
+
+def content_digest(text):
+    """Short digest of a text buffer."""
+    return bytes_digest(text.encode("utf-8", "surrogatepass"))
+
+
+def _common_prefix(a, b):
+    """Length of the common prefix, found by halving with startswith (no full copies)."""
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a.startswith(b[lo:mid], lo):
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _common_suffix(a, b, limit):
+    """Length of the common suffix, at most `limit` characters."""
+    lo, hi = 0, limit
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a.endswith(b[len(b) - mid:len(b) - lo], 0, len(a) - lo):
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def make_patch(old, new):
+    """Reverse patch (start, end, replacement) that turns `new` back into `old`."""
+    prefix = _common_prefix(old, new)
+    suffix = _common_suffix(old, new, min(len(old), len(new)) - prefix)
+    return prefix, len(new) - suffix, old[prefix:len(old) - suffix]
+
+
+def apply_patch(text, patch):
+    """Apply a patch produced by make_patch."""
+    start, end, replacement = patch
+    return text[:start] + replacement + text[end:]
+
+
+class ChangeTracker:
+    """Tracks edits to a buffer without keeping a copy of the saved content.
+
+    The saved state is remembered as a digest and length; every edit is journaled
+    as a reverse patch covering just the changed region, so reverting replays the
+    journal backwards over the current buffer.
+    """
+
+    def __init__(self, content=""):
+        self.reset(content)
+
+    def reset(self, content):
+        """Mark `content` as the saved state and clear the journal."""
+        self.saved_digest = content_digest(content)
+        self.saved_length = len(content)
+        self.journal = []
+
+    def record(self, old, new):
+        """Journal the edit from `old` to `new`."""
+        self.journal.append(make_patch(old, new))
+
+    def is_dirty(self, content):
+        """Whether `content` differs from the saved state."""
+        if not self.journal:
+            return False
+        if len(content) != self.saved_length:
+            return True
+        return content_digest(content) != self.saved_digest
+
+    def original(self, content):
+        """Rebuild the saved content from `content` without touching the journal."""
+        for patch in reversed(self.journal):
+            content = apply_patch(content, patch)
+        return content
+
+    def revert(self, content):
+        """Undo every journaled edit, returning the saved content."""
+        content = self.original(content)
+        self.journal.clear()
+        return content
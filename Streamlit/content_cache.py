@@ -0,0 +1,59 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+from file_saver import read_text_with_snapshot
+
+
+class SharedContentCache:
+    """Size-bounded LRU of decoded file contents, shared by every session of the server.
+
+    Entries are keyed on (path, mtime, size), so a file changed on disk simply
+    misses. Sessions keep a reference to the cached string rather than a copy of
+    their own; their edits live in their change journal.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.total_bytes = 0
+        self._entries = OrderedDict()  # path -> (content, snapshot, cost)
+        self._lock = threading.Lock()
+
+    def read(self, path, encoding="utf-8"):
+        """Return (content, snapshot) for a text file, reading it only on a miss."""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and (entry[1].mtime_ns, entry[1].size) == (stat.st_mtime_ns, stat.st_size):
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry[0], entry[1]
+            self.misses += 1
+        content, snapshot = read_text_with_snapshot(path, encoding)
+        self.put(path, content, snapshot)
+        return content, snapshot
+
+    def put(self, path, content, snapshot):
+        """Publish the content of a file as of `snapshot`, e.g. right after saving it."""
+        path = os.path.abspath(path)
+        cost = sys.getsizeof(content)
+        with self._lock:
+            old = self._entries.pop(path, None)
+            if old is not None:
+                self.total_bytes -= old[2]
+            if cost > self.max_bytes:
+                return
+            self._entries[path] = (content, snapshot, cost)
+            self.total_bytes += cost
+            while self.total_bytes > self.max_bytes:
+                _, (_, _, evicted_cost) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted_cost
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
@@ -0,0 +1,146 @@
+import bisect
+import difflib
+from collections import Counter
+
+
+def _intern(lines, table):
+    """Map each line to a small integer id shared by both sides of the diff."""
+    return [table.setdefault(line, len(table)) for line in lines]
+
+
+class LineDiff:
+    """Lazy line diff of two texts.
+
+    Lines are interned to integer ids so every comparison is an integer compare.
+    Each region is trimmed of its common prefix and suffix, then aligned on lines
+    that occur exactly once on both sides (patience diff); regions with no such
+    anchors fall back to difflib. Opcodes and hunks are generators, so showing the
+    first hunks of a large file never diffs the rest of it.
+    """
+
+    def __init__(self, old_text, new_text):
+        self.old_lines = old_text.splitlines()
+        self.new_lines = new_text.splitlines()
+        table = {}
+        self._a = _intern(self.old_lines, table)
+        self._b = _intern(self.new_lines, table)
+
+    def _anchors(self, alo, ahi, blo, bhi):
+        """Longest increasing run of lines unique to both regions."""
+        a_counts = Counter(self._a[alo:ahi])
+        b_counts = Counter(self._b[blo:bhi])
+        b_index = {line: j for j, line in enumerate(self._b[blo:bhi], blo) if b_counts[line] == 1}
+        pairs = [(i, b_index[line]) for i, line in enumerate(self._a[alo:ahi], alo)
+                 if a_counts[line] == 1 and line in b_index]
+
+        # Patience sorting: longest increasing subsequence of the b positions
+        tails, tail_pairs, previous = [], [], {}
+        for pair in pairs:
+            k = bisect.bisect_left(tails, pair[1])
+            previous[pair] = tail_pairs[k - 1] if k else None
+            if k == len(tails):
+                tails.append(pair[1])
+                tail_pairs.append(pair)
+            else:
+                tails[k] = pair[1]
+                tail_pairs[k] = pair
+        anchors = []
+        pair = tail_pairs[-1] if tail_pairs else None
+        while pair is not None:
+            anchors.append(pair)
+            pair = previous[pair]
+        anchors.reverse()
+        return anchors
+
+    def _diff(self, alo, ahi, blo, bhi):
+        a, b = self._a, self._b
+        i, j = alo, blo
+        while i < ahi and j < bhi and a[i] == b[j]:
+            i += 1
+            j += 1
+        if i > alo:
+            yield "equal", alo, i, blo, j
+        end_i, end_j = ahi, bhi
+        while end_i > i and end_j > j and a[end_i - 1] == b[end_j - 1]:
+            end_i -= 1
+            end_j -= 1
+
+        if i == end_i or j == end_j:
+            if i < end_i or j < end_j:
+                yield "change", i, end_i, j, end_j
+        else:
+            anchors = self._anchors(i, end_i, j, end_j)
+            if anchors:
+                last_i, last_j = i, j
+                for anchor_i, anchor_j in anchors:
+                    yield from self._diff(last_i, anchor_i, last_j, anchor_j)
+                    yield "equal", anchor_i, anchor_i + 1, anchor_j, anchor_j + 1
+                    last_i, last_j = anchor_i + 1, anchor_j + 1
+                yield from self._diff(last_i, end_i, last_j, end_j)
+            else:
+                matcher = difflib.SequenceMatcher(None, a[i:end_i], b[j:end_j], autojunk=False)
+                for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+                    yield ("equal" if tag == "equal" else "change"), i + i1, i + i2, j + j1, j + j2
+
+        if end_i < ahi:
+            yield "equal", end_i, ahi, end_j, bhi
+
+    def opcodes(self):
+        """Yield difflib-style (tag, i1, i2, j1, j2) opcodes in order, merging neighbours."""
+        current = None
+        for op in self._diff(0, len(self._a), 0, len(self._b)):
+            if op[1] == op[2] and op[3] == op[4]:
+                continue
+            if current is not None and current[0] == op[0]:
+                current = (current[0], current[1], op[2], current[3], op[4])
+                continue
+            if current is not None:
+                yield self._tagged(current)
+            current = op
+        if current is not None:
+            yield self._tagged(current)
+
+    @staticmethod
+    def _tagged(op):
+        kind, i1, i2, j1, j2 = op
+        if kind == "change":
+            kind = "delete" if j1 == j2 else "insert" if i1 == i2 else "replace"
+        return kind, i1, i2, j1, j2
+
+    def hunks(self, context=3):
+        """Yield groups of opcodes with up to `context` unchanged lines around each change."""
+        group, leading = [], None
+        for op in self.opcodes():
+            tag, i1, i2, j1, j2 = op
+            if tag != "equal":
+                if not group and leading is not None:
+                    group.append(leading)
+                group.append(op)
+                continue
+            if not group:
+                leading = (tag, max(i1, i2 - context), i2, max(j1, j2 - context), j2)
+            elif i2 - i1 > 2 * context:
+                group.append((tag, i1, i1 + context, j1, j1 + context))
+                yield group
+                group, leading = [], (tag, i2 - context, i2, j2 - context, j2)
+            else:
+                group.append(op)
+        if group:
+            tag, i1, i2, j1, j2 = group[-1]
+            if tag == "equal":
+                group[-1] = (tag, i1, min(i2, i1 + context), j1, min(j2, j1 + context))
+            yield group
+
+    def format_hunk(self, hunk):
+        """Render a hunk as diff text with old and new line numbers."""
+        lines = []
+        for tag, i1, i2, j1, j2 in hunk:
+            if tag == "equal":
+                for offset in range(i2 - i1):
+                    lines.append(f"  {i1 + offset + 1:>6} {j1 + offset + 1:>6} │ {self.old_lines[i1 + offset]}")
+                continue
+            for i in range(i1, i2):
+                lines.append(f"- {i + 1:>6} {'':>6} │ {self.old_lines[i]}")
+            for j in range(j1, j2):
+                lines.append(f"+ {'':>6} {j + 1:>6} │ {self.new_lines[j]}")
+        return "\n".join(lines)
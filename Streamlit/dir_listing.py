@@ -0,0 +1,73 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+def scan_dir(directory):
+    """List directories and files in one os.scandir pass, using DirEntry type info."""
+    dirs, files = [], []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            # d_type answers these without a stat call, except for symlinks
+            if entry.is_dir():
+                dirs.append(entry.name)
+            elif entry.is_file():
+                files.append(entry.name)
+    dirs.sort()
+    files.sort()
+    return tuple(dirs), tuple(files)
+
+
+class DirListingCache:
+    """Process-wide cache of directory listings, keyed on directory inode and mtime.
+
+    A listing checked less than `revalidate_after` seconds ago is returned without
+    touching the filesystem; for directories `is_watched` reports as watched (whose
+    listings are invalidated on change) that is `watched_revalidate_after` seconds.
+    Older listings cost a single stat of the directory and are only rescanned when
+    the directory's (device, inode, mtime) key changed.
+    """
+
+    def __init__(self, max_entries=256, revalidate_after=2.0, watched_revalidate_after=30.0, is_watched=None):
+        self.max_entries = max_entries
+        self.revalidate_after = revalidate_after
+        self.watched_revalidate_after = watched_revalidate_after
+        self.is_watched = is_watched
+        self._entries = OrderedDict()  # path -> (key, checked_at, dirs, files)
+        self._lock = threading.Lock()
+
+    def list_dir(self, directory):
+        """Return sorted (dirs, files) name tuples for the given directory."""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._entries.get(directory)
+            if cached is not None:
+                self._entries.move_to_end(directory)
+        if cached is not None:
+            watched = self.is_watched is not None and self.is_watched(directory)
+            if now - cached[1] < (self.watched_revalidate_after if watched else self.revalidate_after):
+                return cached[2], cached[3]
+
+        # Stat before scanning so a change racing the scan is picked up next time
+        stat = os.stat(directory)
+        key = (stat.st_dev, stat.st_ino, stat.st_mtime_ns)
+        if cached is not None and cached[0] == key:
+            dirs, files = cached[2], cached[3]
+        else:
+            dirs, files = scan_dir(directory)
+
+        with self._lock:
+            self._entries[directory] = (key, now, dirs, files)
+            self._entries.move_to_end(directory)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return dirs, files
+
+    def invalidate(self, directory=None):
+        """Drop the cached listing for a directory, or every listing if none is given."""
+        with self._lock:
+            if directory is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(directory, None)
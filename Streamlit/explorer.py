@@ -0,0 +1,761 @@
+import streamlit as st
+from streamlit.errors import StreamlitAPIException
+import functools
+import os
+import sys
+import time
+import uuid
+
+from change_tracker import ChangeTracker
+from content_cache import SharedContentCache
+from diff_engine import LineDiff
+from dir_listing import DirListingCache
+from file_saver import WRITE_BEHIND_THRESHOLD, SaveConflictError, WriteBehindQueue
+from fs_watcher import FileSystemWatcher
+from large_file import LARGE_FILE_THRESHOLD, WINDOW_LINES, LargeTextFile
+from metrics import ExplorerMetrics
+from pagination import PAGE_SIZES, filter_names, paginate
+from preview import HEX_PREVIEW_BYTES, LINE_MAPPABLE_ENCODINGS, SNIFF_BYTES, hex_dump, sniff
+from search_index import SearchIndex
+from storage import decode_text, storage_from_env
+from syntax_check import SyntaxValidator
+
+# Seconds between polls of a pending background syntax check
+VALIDATION_POLL_INTERVAL = 1.0
+# Seconds between polls of a save running on the write-behind queue
+SAVE_POLL_INTERVAL = 0.5
+# Seconds between checks for on-disk changes to the open directory and file
+WATCH_POLL_INTERVAL = 2.0
+# Seconds between result refreshes while a search index is still being built
+SEARCH_POLL_INTERVAL = 1.0
+# Diff hunks sent to the browser per "Show more" click
+DIFF_PAGE_HUNKS = 10
+# Bytes of a large file fetched for a read-only preview on non-local storage
+PREVIEW_BYTES = 256 * 1024
+# Seconds between refreshes of the debug panel
+DEBUG_REFRESH_INTERVAL = 2.0
+# Set EXPLORER_DEBUG=1 (or open the app with ?debug=1) to show the debug panel
+DEBUG = os.environ.get("EXPLORER_DEBUG", "0") != "0"
+# Set EXPLORER_METRICS_PORT to serve Prometheus metrics at http://127.0.0.1:<port>/metrics
+METRICS_PORT = os.environ.get("EXPLORER_METRICS_PORT")
+# Set EXPLORER_WRITE_BEHIND=0 to always save large files on the script thread
+WRITE_BEHIND = os.environ.get("EXPLORER_WRITE_BEHIND", "1") != "0"
+
+
+def utf8_size(text):
+    """Bytes `text` takes on the wire."""
+    return len(text.encode("utf-8", errors="replace"))
+
+
+@st.cache_resource
+def get_metrics():
+    """Metrics shared by every session, served as Prometheus text when METRICS_PORT is set."""
+    metrics = ExplorerMetrics()
+    if METRICS_PORT:
+        metrics.serve(int(METRICS_PORT))
+    return metrics
+
+
+@st.cache_resource
+def get_listing_cache():
+    """Directory listing cache shared by every session of this server."""
+    return DirListingCache()
+
+
+@st.cache_resource
+def get_content_cache():
+    """File contents shared by every session, so an open file is held in memory once."""
+    return SharedContentCache()
+
+
+@st.cache_resource
+def get_storage():
+    """Storage backend chosen by EXPLORER_STORAGE, shared by every session of this server."""
+    return storage_from_env(get_listing_cache(), get_content_cache())
+
+
+@st.cache_resource
+def get_syntax_validator():
+    """Background syntax validator shared by every session of this server."""
+    return SyntaxValidator(metrics=get_metrics())
+
+
+@st.cache_resource
+def get_write_behind_queue():
+    """Background save queue shared by every session of this server."""
+    return WriteBehindQueue()
+
+
+@st.cache_resource(max_entries=8)
+def get_search_index(root, index_contents):
+    """Recursive search index for a directory, shared by every session of this server."""
+    return SearchIndex(root, index_contents=index_contents)
+
+
+@st.cache_resource
+def get_fs_watcher():
+    """Filesystem watcher shared by every session; it invalidates cached listings on change."""
+    listing_cache = get_listing_cache()
+    watcher = FileSystemWatcher(on_dir_change=listing_cache.invalidate)
+    # Listings of directories inotify watches are invalidated on change, so they are re-checked far less
+    # often; polled directories (network filesystems among them) keep the short stat revalidation
+    listing_cache.is_watched = watcher.is_native
+    return watcher
+
+
+class FileExplorerEditor:
+    def __init__(self):
+        """Initialize session state variables."""
+        self.storage = get_storage()
+
+        if "current_path" not in st.session_state:
+            st.session_state.current_path = self.storage.root
+        if "selected_file" not in st.session_state:
+            st.session_state.selected_file = None
+        if "file_content" not in st.session_state:
+            st.session_state.file_content = ""
+        if "file_bytes" not in st.session_state:
+            st.session_state.file_bytes = 0
+        if "change_tracker" not in st.session_state:
+            st.session_state.change_tracker = ChangeTracker()
+        if "editor_version" not in st.session_state:
+            st.session_state.editor_version = 0
+        if "read_only_note" not in st.session_state:
+            st.session_state.read_only_note = None
+        if "file_encoding" not in st.session_state:
+            st.session_state.file_encoding = "utf-8"
+        if "binary_preview" not in st.session_state:
+            st.session_state.binary_preview = None
+        if "file_snapshot" not in st.session_state:
+            st.session_state.file_snapshot = None
+        if "pending_save" not in st.session_state:
+            st.session_state.pending_save = None
+        if "save_conflict" not in st.session_state:
+            st.session_state.save_conflict = False
+        if "save_error" not in st.session_state:
+            st.session_state.save_error = None
+        if "file_generation" not in st.session_state:
+            st.session_state.file_generation = 0
+        if "validation_key" not in st.session_state:
+            st.session_state.validation_key = uuid.uuid4().hex
+        if "watch_key" not in st.session_state:
+            st.session_state.watch_key = uuid.uuid4().hex
+        if "watched_file" not in st.session_state:
+            st.session_state.watched_file = None
+        if "watch_baselines" not in st.session_state:
+            st.session_state.watch_baselines = {}
+        if "validation_digest" not in st.session_state:
+            st.session_state.validation_digest = None
+        if "unsaved_changes" not in st.session_state:
+            st.session_state.unsaved_changes = False
+        if "large_file" not in st.session_state:
+            st.session_state.large_file = None
+        if "window_start" not in st.session_state:
+            st.session_state.window_start = 1
+        if "window_version" not in st.session_state:
+            st.session_state.window_version = 0
+        if "diff_view" not in st.session_state:
+            st.session_state.diff_view = None
+        if "diff_hunks_shown" not in st.session_state:
+            st.session_state.diff_hunks_shown = DIFF_PAGE_HUNKS
+        if "phase_timings" not in st.session_state:
+            st.session_state.phase_timings = {}
+        if "sent_bytes" not in st.session_state:
+            st.session_state.sent_bytes = {}
+        if "page" not in st.session_state:
+            st.session_state.page = 0
+        if "page_size" not in st.session_state:
+            st.session_state.page_size = PAGE_SIZES[1]
+        if "name_filter" not in st.session_state:
+            st.session_state.name_filter = ""
+
+    def list_dir_contents(self, directory):
+        """List directories and files in the given path."""
+        try:
+            with self.timer("listing"):
+                if self.storage.is_local:
+                    self.report_shown()
+                    self.mark_seen(directory)
+                dirs, files = self.storage.list_dir(directory)
+            get_metrics().add("explorer_listed_entries_total", len(dirs) + len(files))
+            return dirs, files
+        except Exception as e:
+            st.error(f"Error accessing directory: {e}")
+            return [], []
+
+    def report_shown(self):
+        """Tell the shared watcher which directory and file this session shows, keeping them watched."""
+        file_path = st.session_state.watched_file
+        get_fs_watcher().show(st.session_state.watch_key, [st.session_state.current_path],
+                              [file_path] if file_path else [])
+
+    def mark_seen(self, path):
+        """Record the generation of a path as rendered now; the change watch reruns the app when it moves on."""
+        shown = {st.session_state.current_path, st.session_state.watched_file}
+        baselines = {p: g for p, g in st.session_state.watch_baselines.items() if p in shown}
+        baselines[path] = get_fs_watcher().generation(path)
+        st.session_state.watch_baselines = baselines
+
+    def timer(self, phase):
+        """Time a phase into the shared metrics and this session's latest timings."""
+        return get_metrics().timer(phase, st.session_state.phase_timings)
+
+    def record_sent(self, pane, *texts, size=None):
+        """Count the content a pane sends to the browser on this rerun; pass `size` when it is already known."""
+        if size is None:
+            size = sum(utf8_size(text) for text in texts)
+        st.session_state.sent_bytes[pane] = size
+        get_metrics().add("explorer_sent_bytes_total", size, pane=pane)
+
+    def rerun_pane(self):
+        """Rerun only the pane (fragment) being rendered, or the whole app during a full run."""
+        try:
+            st.rerun(scope="fragment")
+        except StreamlitAPIException:
+            st.rerun()
+
+    def stop_polling(self):
+        """Rerun once so a polling fragment is redefined without run_every.
+
+        run_every is fixed when a fragment is defined, and a nested fragment cannot
+        rerun the pane that defines it, so this reruns the app.
+        """
+        st.rerun()
+
+    def navigate_back(self):
+        """Navigate up one directory level."""
+        parent_dir = self.storage.parent(st.session_state.current_path)
+        if parent_dir != st.session_state.current_path:
+            st.session_state.current_path = parent_dir
+            st.session_state.page = 0
+            self.rerun_pane()
+
+    def reset_page(self):
+        """Go back to the first page of the listing."""
+        st.session_state.page = 0
+
+    def change_page(self, step):
+        """Move the listing window by the given number of pages."""
+        st.session_state.page += step
+
+    def render_search(self):
+        """Search file names, or optionally contents, anywhere below the current directory."""
+        query = st.text_input("🔎 Search below this folder", key="search_query")
+        search_contents = st.checkbox("Search file contents", key="search_contents")
+        if not query:
+            return
+        index = get_search_index(st.session_state.current_path, search_contents)
+        index.refresh()
+        polling = not index.ready
+
+        @st.fragment(run_every=SEARCH_POLL_INTERVAL if polling else None)
+        def search_results():
+            if polling and index.ready:
+                self.stop_polling()
+            started = time.perf_counter()
+            results = index.search_content(query) if search_contents else index.search_names(query)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            status = "" if index.ready else " (index still building)"
+            st.caption(f"{len(results)} matches in {elapsed_ms:.1f} ms across {index.file_count} files{status}")
+            for path in results:
+                file_path = os.path.join(st.session_state.current_path, path)
+                if st.button(f"📄 {path}", key=f"search_{file_path}"):
+                    self.select_file(file_path)
+
+        search_results()
+
+    def select_folder(self, folder_path):
+        """Set the selected folder as the current path."""
+        st.session_state.current_path = folder_path
+        st.session_state.page = 0
+        self.rerun_pane()
+
+    def select_file(self, file_path):
+        """Load file content into session state."""
+        if st.session_state.unsaved_changes:
+            st.error("You have unsaved changes. Please save or revert your changes before selecting another file.")
+            return
+
+        try:
+            st.session_state.large_file = None
+            st.session_state.watched_file = None
+            with self.timer("read"):
+                size = self.storage.stat(file_path).size
+                # Decide how to open the file from its first few KB only
+                head = self.storage.read_range(file_path, 0, SNIFF_BYTES)
+                sniffed = sniff(head)
+                encoding = sniffed.encoding or "utf-8"
+                read_only_note = None
+                binary_preview = None
+                content = ""
+                if sniffed.is_binary:
+                    binary_preview = (sniffed, size, head[:HEX_PREVIEW_BYTES])
+                    st.session_state.file_snapshot = None
+                elif size > LARGE_FILE_THRESHOLD and self.storage.is_local and encoding in LINE_MAPPABLE_ENCODINGS:
+                    # Large files are read and edited a window at a time
+                    st.session_state.large_file = LargeTextFile(file_path, encoding)
+                    st.session_state.window_start = 1
+                elif size > LARGE_FILE_THRESHOLD:
+                    # Otherwise only the head of a large file is fetched, with a range read
+                    content = decode_text(self.storage.read_range(file_path, 0, PREVIEW_BYTES), encoding,
+                                          errors="replace")
+                    st.session_state.file_snapshot = None
+                    reason = "large files can only be edited on local storage" if not self.storage.is_local \
+                        else f"large {sniffed.description} files cannot be edited a window at a time"
+                    read_only_note = (f"Showing the first {PREVIEW_BYTES // 1024} KB of a {size / 1024 / 1024:.1f} MB "
+                                      f"file; {reason}.")
+                else:
+                    if self.storage.is_local:
+                        st.session_state.watched_file = file_path
+                        self.report_shown()
+                        st.session_state.file_generation = get_fs_watcher().generation(file_path)
+                    content, st.session_state.file_snapshot = self.storage.read_text(file_path, encoding)
+                    if self.storage.read_only:
+                        read_only_note = f"{self.storage.describe()} is read-only."
+            st.session_state.file_encoding = encoding
+            st.session_state.binary_preview = binary_preview
+            st.session_state.read_only_note = read_only_note
+            st.session_state.save_conflict = False
+            st.session_state.file_content = content
+            st.session_state.file_bytes = utf8_size(content)
+            st.session_state.change_tracker = ChangeTracker(content)
+            st.session_state.editor_version += 1
+            st.session_state.validation_digest = None
+            st.session_state.selected_file = file_path
+            st.session_state.unsaved_changes = False
+            st.session_state.diff_view = None
+            st.rerun()
+        except Exception as e:
+            st.error(f"Error reading file: {e}")
+
+    def check_disk_changes(self):
+        """Warn when the open file was changed on disk by someone other than this session."""
+        path = st.session_state.selected_file
+        self.mark_seen(path)
+        generation = get_fs_watcher().generation(path)
+        if generation == st.session_state.file_generation:
+            return
+        snapshot = st.session_state.file_snapshot
+        try:
+            stat = os.stat(path)
+            own_write = snapshot is not None and (stat.st_mtime_ns, stat.st_size) == (snapshot.mtime_ns, snapshot.size)
+        except FileNotFoundError:
+            own_write = False
+        if own_write:
+            st.session_state.file_generation = generation
+            return
+        st.warning("This file was changed on disk after it was opened.")
+        if st.button("🔄 Reload from Disk"):
+            st.session_state.unsaved_changes = False
+            self.select_file(path)
+
+    def render_change_watch(self):
+        """Rerun the app when the watcher reports a change to the open directory or file.
+
+        Generations are compared with the ones last rendered, by path, so a directory the
+        explorer pane navigated to on its own is compared with its own baseline.
+        """
+        watcher = get_fs_watcher()
+
+        @st.fragment(run_every=WATCH_POLL_INTERVAL)
+        def change_watch():
+            # Also renews this session's lease on its watches
+            self.report_shown()
+            baselines = st.session_state.watch_baselines
+            if any(watcher.generation(path) != generation for path, generation in baselines.items()):
+                st.rerun()
+
+        change_watch()
+
+    def track_changes(self, new_content):
+        """Journal the edit made since the last rerun and refresh the unsaved flag."""
+        old_content = st.session_state.file_content
+        if new_content != old_content:
+            tracker = st.session_state.change_tracker
+            tracker.record(old_content, new_content)
+            st.session_state.file_content = new_content
+            st.session_state.file_bytes = utf8_size(new_content)
+            st.session_state.unsaved_changes = tracker.is_dirty(new_content)
+            st.session_state.validation_digest = None
+
+    def is_valid_python_code(self, code):
+        """Check if Python code has valid syntax, reusing the background result when there is one."""
+        # Parses themselves are timed as "validate" by the validator; this is the wait a save sees
+        with self.timer("validate_on_save"):
+            error_msg = get_syntax_validator().validate_now(code)
+        return error_msg is None, error_msg
+
+    def render_diagnostics(self, code):
+        """Show live syntax diagnostics without waiting for the check to finish."""
+        validator = get_syntax_validator()
+        digest = st.session_state.validation_digest
+        if digest is None or not validator.knows(digest):
+            digest = validator.submit(st.session_state.validation_key, code)
+            st.session_state.validation_digest = digest
+
+        # Polls for as long as the file is open: a poll is a dict lookup and one caption, and stopping
+        # would take a rerun of the whole app (run_every is fixed when a fragment is defined)
+        @st.fragment(run_every=VALIDATION_POLL_INTERVAL)
+        def diagnostics():
+            done, error_msg = validator.result(digest)
+            if not done:
+                st.caption("⏳ Checking syntax...")
+            elif error_msg:
+                st.warning(f"Syntax Error: {error_msg}")
+            else:
+                st.caption("✅ Syntax OK")
+
+        diagnostics()
+
+    def save_file(self, new_content, overwrite=False):
+        """Save file changes atomically, with syntax validation for Python files.
+
+        The save is refused if the file changed on disk since it was opened, unless
+        `overwrite` is set. Large saves are handed to the write-behind queue.
+        """
+        try:
+            if st.session_state.selected_file.endswith(".py"):
+                is_valid, error_msg = self.is_valid_python_code(new_content)
+                if not is_valid:
+                    st.error(f"Syntax Error: {error_msg}")
+                    return
+
+            expected = None if overwrite else st.session_state.file_snapshot
+            # Files are written back in the encoding they were read with
+            write = functools.partial(self.storage.write_text, encoding=st.session_state.file_encoding)
+            if WRITE_BEHIND and len(new_content) > WRITE_BEHIND_THRESHOLD:
+                future = get_write_behind_queue().submit(st.session_state.selected_file, new_content, expected,
+                                                         write=write)
+                st.session_state.pending_save = (future, st.session_state.selected_file, new_content)
+                st.rerun()
+
+            with self.timer("save"):
+                snapshot = write(st.session_state.selected_file, new_content, expected)
+            self.finish_save(st.session_state.selected_file, new_content, snapshot)
+            st.success("File saved successfully!")
+
+        except SaveConflictError as e:
+            st.session_state.save_conflict = True
+            st.error(f"Save refused: {e}. Reopen the file to load that version, or overwrite it.")
+        except Exception as e:
+            st.error(f"Error saving file: {e}")
+
+    def finish_save(self, path, content, snapshot):
+        """Publish a completed save and, if the file is still open, make it the new baseline."""
+        if path != st.session_state.selected_file:
+            return
+        if st.session_state.large_file is not None:
+            # The saved window is re-read from the rewritten file
+            st.session_state.unsaved_changes = False
+            st.session_state.window_version += 1
+            return
+        st.session_state.file_snapshot = snapshot
+        st.session_state.save_conflict = False
+        st.session_state.change_tracker.reset(content)
+        st.session_state.unsaved_changes = False
+        st.session_state.diff_view = None
+
+    def render_pending_save(self):
+        """Poll the write-behind queue until the background save completes."""
+        @st.fragment(run_every=SAVE_POLL_INTERVAL)
+        def pending_save():
+            future, path, content = st.session_state.pending_save
+            if not future.done():
+                st.caption("💾 Saving in the background...")
+                return
+            st.session_state.pending_save = None
+            try:
+                self.finish_save(path, content, future.result())
+            except SaveConflictError as e:
+                st.session_state.save_conflict = True
+                st.session_state.save_error = f"Save refused: {e}. Reopen the file to load that version, or overwrite it."
+            except Exception as e:
+                st.session_state.save_error = f"Error saving file: {e}"
+            # Re-enable the editor
+            st.rerun()
+
+        pending_save()
+
+    def show_more_hunks(self):
+        """Extend the diff panel by another page of hunks."""
+        st.session_state.diff_hunks_shown += DIFF_PAGE_HUNKS
+
+    def render_diff(self):
+        """Show unsaved changes as line-numbered hunks, diffing only as far as is displayed."""
+        content = st.session_state.file_content
+        tracker = st.session_state.change_tracker
+        # A save or revert moves the baseline without changing the buffer
+        baseline = (tracker.saved_digest, len(tracker.journal))
+        view = st.session_state.diff_view
+        if view is None or view["content"] is not content or view["baseline"] != baseline:
+            diff = LineDiff(tracker.original(content), content)
+            view = {"content": content, "baseline": baseline, "diff": diff, "hunks": [], "pending": diff.hunks()}
+            st.session_state.diff_view = view
+            st.session_state.diff_hunks_shown = DIFF_PAGE_HUNKS
+
+        # Pull hunks from the lazy diff only until the visible page is filled
+        while view["pending"] is not None and len(view["hunks"]) < st.session_state.diff_hunks_shown:
+            hunk = next(view["pending"], None)
+            if hunk is None:
+                view["pending"] = None
+            else:
+                view["hunks"].append(view["diff"].format_hunk(hunk))
+
+        if not view["hunks"]:
+            st.caption("No unsaved changes.")
+        shown = view["hunks"][:st.session_state.diff_hunks_shown]
+        for text in shown:
+            st.code(text, language="diff")
+        self.record_sent("diff", *shown)
+        if view["pending"] is not None:
+            st.button("Show more hunks", on_click=self.show_more_hunks)
+
+    def render_large_file(self):
+        """Render an editable window of lines from a large file."""
+        large = st.session_state.large_file
+        st.write(f"**Editing:** `{st.session_state.selected_file}`")
+        if st.session_state.save_error:
+            st.error(st.session_state.save_error)
+            st.session_state.save_error = None
+        if st.session_state.pending_save is not None:
+            # The save rebuilds the line index in the background; show the window being written until it is done
+            st.text_area("Saving lines:", st.session_state.pending_save[2], height=600, disabled=True)
+            self.render_pending_save()
+            return
+        st.caption(f"Large file mode: {large.size / 1024 / 1024:.1f} MB, {large.line_count} lines, "
+                   f"{WINDOW_LINES} lines shown at a time.")
+
+        st.session_state.window_start = min(st.session_state.window_start, large.line_count)
+        first_line = st.number_input("First line", min_value=1, max_value=large.line_count, step=WINDOW_LINES,
+                                     key="window_start", disabled=st.session_state.unsaved_changes)
+        start = first_line - 1
+        try:
+            window = large.read_lines(start, WINDOW_LINES)
+        except OSError as e:
+            st.error(f"Error reading file: {e}")
+            return
+        if large.stale:
+            st.warning("This file was changed on disk after it was opened.")
+            if st.button("🔄 Reload from Disk"):
+                large.reload()
+                st.session_state.unsaved_changes = False
+                st.session_state.window_version += 1
+                self.rerun_pane()
+        last_line = min(start + WINDOW_LINES, large.line_count)
+        new_window = st.text_area(f"Edit lines {first_line}-{last_line}:", window, height=600,
+                                  key=f"window_{start}_{st.session_state.window_version}")
+        self.record_sent("editor", window)
+        st.session_state.unsaved_changes = new_window != window
+
+        col_save, col_revert = st.columns(2)
+        with col_save:
+            if st.button("💾 Save Window"):
+                try:
+                    if WRITE_BEHIND and large.size > WRITE_BEHIND_THRESHOLD:
+                        # Saving a window rewrites the whole file, so it goes through the write-behind queue
+                        def write(path, text, expected):
+                            # The large file checks its own snapshot for conflicts
+                            return large.replace_lines(start, WINDOW_LINES, text)
+
+                        future = get_write_behind_queue().submit(st.session_state.selected_file, new_window,
+                                                                 write=write)
+                        st.session_state.pending_save = (future, st.session_state.selected_file, new_window)
+                        st.rerun()
+                    with self.timer("save"):
+                        large.replace_lines(start, WINDOW_LINES, new_window)
+                    st.session_state.unsaved_changes = False
+                    st.session_state.window_version += 1
+                    self.rerun_pane()
+                except SaveConflictError as e:
+                    st.error(f"Save refused: {e}. Reload the file to load that version.")
+                except Exception as e:
+                    st.error(f"Error saving file: {e}")
+        with col_revert:
+            if st.button("↩ Revert Changes"):
+                st.session_state.unsaved_changes = False
+                st.session_state.window_version += 1
+                self.rerun_pane()
+
+    def render_binary_preview(self):
+        """Show what a binary file is, with a hex dump of its head, instead of opening it."""
+        sniffed, size, head = st.session_state.binary_preview
+        st.write(f"**Viewing:** `{st.session_state.selected_file}`")
+        st.info(f"{sniffed.description}, {size:,} bytes. Binary files are previewed instead of opened in the editor.")
+        for name, value in sniffed.details.items():
+            st.caption(f"{name}: {value}")
+        dump = hex_dump(head)
+        st.code(dump, language=None)
+        self.record_sent("editor", dump)
+
+    @st.fragment
+    def render_explorer(self):
+        """Render the explorer pane; navigating reruns only this fragment."""
+        st.subheader("📁 File Explorer")
+        started = time.perf_counter()
+
+        # Navigate up button; the open file and its unsaved edits stay in the editor pane
+        if self.storage.parent(st.session_state.current_path) != st.session_state.current_path:
+            if st.button("🔙 Go Back"):
+                self.navigate_back()
+
+        # Display current directory
+        st.write(f"**Current Directory:** `{st.session_state.current_path}`")
+        if not self.storage.is_local:
+            st.caption(f"Storage: {self.storage.describe()}")
+
+        # The search index walks the local filesystem
+        if self.storage.is_local:
+            self.render_search()
+
+        # List directory contents
+        dirs, files = self.list_dir_contents(st.session_state.current_path)
+
+        # Only the visible page of the (filtered) listing becomes widgets
+        name_filter = st.text_input("🔍 Filter", key="name_filter", on_change=self.reset_page)
+        dirs = filter_names(dirs, name_filter)
+        files = filter_names(files, name_filter)
+        page_dirs, page_files, page, page_count = paginate(
+            dirs, files, st.session_state.page, st.session_state.page_size)
+        st.session_state.page = page
+
+        # Display folders as buttons
+        for folder in page_dirs:
+            folder_path = self.storage.join(st.session_state.current_path, folder)
+            if st.button(f"📂 {folder}", key=f"folder_{folder_path}"):
+                self.select_folder(folder_path)
+
+        # Display files as buttons
+        for file in page_files:
+            file_path = self.storage.join(st.session_state.current_path, file)
+            if st.button(f"📄 {file}", key=f"file_{file_path}"):
+                self.select_file(file_path)
+        self.record_sent("explorer", *page_dirs, *page_files)
+
+        # Page controls
+        col_prev, col_page, col_next = st.columns([1, 2, 1])
+        with col_prev:
+            st.button("◀ Prev", on_click=self.change_page, args=(-1,), disabled=page == 0)
+        with col_page:
+            st.caption(f"Page {page + 1} of {page_count} · {len(dirs) + len(files)} items")
+        with col_next:
+            st.button("Next ▶", on_click=self.change_page, args=(1,), disabled=page >= page_count - 1)
+        st.selectbox("Items per page", PAGE_SIZES, key="page_size", on_change=self.reset_page)
+
+        self.record_pane_time("explorer", started)
+
+    @st.fragment
+    def render_editor(self):
+        """Render the editor pane; typing reruns only this fragment."""
+        st.subheader("📝 File Editor")
+        started = time.perf_counter()
+
+        if st.session_state.selected_file and st.session_state.binary_preview is not None:
+            self.render_binary_preview()
+        elif st.session_state.selected_file and st.session_state.large_file is not None:
+            self.render_large_file()
+        elif st.session_state.selected_file:
+            st.write(f"**Editing:** `{st.session_state.selected_file}`")
+            read_only = st.session_state.read_only_note is not None
+            if read_only:
+                st.info(st.session_state.read_only_note)
+            if self.storage.is_local:
+                self.check_disk_changes()
+            saving = st.session_state.pending_save is not None
+            new_content = st.text_area("Edit file:", st.session_state.file_content, height=600,
+                                       key=f"editor_{st.session_state.editor_version}", disabled=saving or read_only)
+            # The buffer's size is kept up to date as it changes, rather than re-encoded on every rerun
+            self.record_sent("editor", size=st.session_state.file_bytes)
+            self.track_changes(new_content)
+            if st.session_state.selected_file.endswith(".py"):
+                self.render_diagnostics(new_content)
+
+            if saving:
+                self.render_pending_save()
+            if st.session_state.save_error:
+                st.error(st.session_state.save_error)
+                st.session_state.save_error = None
+
+            col_save, col_revert = st.columns(2)
+            with col_save:
+                if st.button("💾 Save Changes", disabled=saving or read_only):
+                    self.save_file(new_content)
+                if st.session_state.save_conflict and st.button("⚠ Overwrite File on Disk", disabled=saving):
+                    self.save_file(new_content, overwrite=True)
+            with col_revert:
+                if st.button("↩ Revert Changes", disabled=saving or read_only):
+                    try:
+                        tracker = st.session_state.change_tracker
+                        st.session_state.file_content = tracker.revert(st.session_state.file_content)
+                        st.session_state.file_bytes = utf8_size(st.session_state.file_content)
+                        st.session_state.unsaved_changes = False
+                        st.session_state.diff_view = None
+                        st.session_state.editor_version += 1
+                        self.rerun_pane()
+                    except Exception as e:
+                        st.error(f"Error reverting file: {e}")
+            if st.toggle("🔍 Show diff", key="show_diff"):
+                self.render_diff()
+            else:
+                # The view holds the rebuilt original; keep it only while the diff is shown
+                st.session_state.diff_view = None
+        else:
+            st.info("Select a file to edit.")
+
+        self.record_pane_time("editor", started)
+
+    def record_pane_time(self, pane, started):
+        """Store and show how long the server spent rendering a pane."""
+        elapsed = time.perf_counter() - started
+        get_metrics().observe(f"render_{pane}", elapsed)
+        st.session_state.phase_timings[f"render_{pane}"] = elapsed * 1000
+        st.caption(f"⏱ {pane.capitalize()} rendered in {elapsed * 1000:.1f} ms")
+
+    def session_state_bytes(self):
+        """Rough size of this session's state; shared objects such as cached contents are counted too."""
+        total = 0
+        for value in st.session_state.values():
+            total += sys.getsizeof(value)
+            if isinstance(value, (dict, list, tuple)):
+                total += sum(sys.getsizeof(item) for item in (value.values() if isinstance(value, dict) else value))
+        return total
+
+    @st.fragment(run_every=DEBUG_REFRESH_INTERVAL)
+    def render_debug_panel(self):
+        """Show this session's latest timings and sizes next to the process-wide metrics."""
+        with st.expander("🛠 Debug metrics", expanded=True):
+            st.write("**This session**")
+            st.table({"phase": list(st.session_state.phase_timings),
+                      "last (ms)": [f"{ms:.2f}" for ms in st.session_state.phase_timings.values()]})
+            sent = ", ".join(f"{pane} {size:,} B" for pane, size in st.session_state.sent_bytes.items())
+            st.caption(f"Sent on last rerun: {sent or 'nothing yet'}")
+            st.caption(f"Session state: ~{self.session_state_bytes() / 1024:.0f} KB")
+
+            st.write("**All sessions**")
+            summary = get_metrics().summary()
+            st.table({"phase": list(summary),
+                      "count": [count for count, _ in summary.values()],
+                      "mean (ms)": [f"{mean:.2f}" for _, mean in summary.values()]})
+            content_cache = get_content_cache()
+            st.caption(f"Content cache: {content_cache.total_bytes / 1024 / 1024:.1f} MB, "
+                       f"hit rate {content_cache.hit_rate:.0%}")
+            if METRICS_PORT:
+                st.caption(f"Prometheus metrics: http://127.0.0.1:{METRICS_PORT}/metrics")
+
+    def render(self):
+        """Render the Streamlit UI."""
+        st.title("📂 File Explorer with Editor")
+
+        col1, col2 = st.columns([2, 3])
+
+        with col1:
+            self.render_explorer()
+
+        with col2:
+            self.render_editor()
+
+        if self.storage.is_local:
+            self.render_change_watch()
+
+        if DEBUG or st.query_params.get("debug") == "1":
+            with st.sidebar:
+                self.render_debug_panel()
@@ -0,0 +1,136 @@
+import io
+import os
+import tempfile
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from change_tracker import bytes_digest, new_digest
+
+# Saves larger than this go through the write-behind queue when it is enabled
+WRITE_BEHIND_THRESHOLD = 1024 * 1024
+# Bytes read at a time when hashing a file on disk
+HASH_CHUNK = 1024 * 1024
+
+
+class SaveConflictError(Exception):
+    """The file changed on disk after it was opened in the editor."""
+
+
+@dataclass(frozen=True)
+class FileSnapshot:
+    """What a file looked like on disk when it was read or written."""
+    mtime_ns: int
+    size: int
+    digest: bytes
+
+
+def read_text_with_snapshot(path, encoding="utf-8"):
+    """Read a text file once, returning its content and an on-disk snapshot."""
+    with open(path, "rb") as f:
+        stat = os.fstat(f.fileno())
+        data = f.read()
+    snapshot = FileSnapshot(stat.st_mtime_ns, len(data), bytes_digest(data))
+    # Decode like text mode would, universal newlines included
+    content = io.TextIOWrapper(io.BytesIO(data), encoding=encoding).read()
+    return content, snapshot
+
+
+# One lock per path so the conflict check and the rename happen together
+_path_locks = defaultdict(threading.Lock)
+_path_locks_guard = threading.Lock()
+
+
+def _lock_for(path):
+    with _path_locks_guard:
+        return _path_locks[os.path.realpath(path)]
+
+
+def check_unchanged(path, expected):
+    """Raise SaveConflictError if the file no longer matches `expected`."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise SaveConflictError(f"{path} was deleted after it was opened")
+    if (stat.st_mtime_ns, stat.st_size) == (expected.mtime_ns, expected.size):
+        return
+    # Metadata moved; only a content change counts as a conflict
+    digest = new_digest()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    if digest.digest() != expected.digest:
+        raise SaveConflictError(f"{path} was changed on disk after it was opened")
+
+
+def _fsync_dir(directory):
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write(path, content, expected=None, encoding="utf-8"):
+    """Durably replace `path` with `content` and return the new snapshot.
+
+    The data is written to a temporary file in the same directory, fsynced and
+    renamed over the target, so readers see either the old or the new file. When
+    `expected` is given the save is refused if the file changed since then.
+    """
+    return atomic_replace(path, [content.encode(encoding)], expected)
+
+
+def atomic_replace(path, chunks, expected=None):
+    """atomic_write() for content given as an iterable of byte chunks.
+
+    The chunks are consumed after the conflict check, under the path lock, so they
+    may be read from the current file (e.g. to rewrite one window of a large file).
+    """
+    # Replace the file a symlink points to, not the link itself
+    path = os.path.realpath(path)
+    directory = os.path.dirname(path)
+    with _lock_for(path):
+        if expected is not None:
+            check_unchanged(path, expected)
+
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+        digest = new_digest()
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    digest.update(chunk)
+                    size += len(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+            try:
+                os.chmod(tmp_path, os.stat(path).st_mode & 0o7777)
+            except FileNotFoundError:
+                pass
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        _fsync_dir(directory)
+
+        stat = os.stat(path)
+    return FileSnapshot(stat.st_mtime_ns, size, digest.digest())
+
+
+class WriteBehindQueue:
+    """Runs atomic saves on one background thread, in submission order."""
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="write-behind")
+
+    def submit(self, path, content, expected=None, write=atomic_write):
+        """Queue a save through `write` and return a Future resolving to the new FileSnapshot."""
+        return self._executor.submit(write, path, content, expected)
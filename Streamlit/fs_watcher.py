@@ -0,0 +1,187 @@
+import itertools
+import os
+import threading
+import time
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # watchdog is optional; fall back to polling
+    FileSystemEventHandler = object
+    Observer = None
+
+# Event types that can change a directory listing or a file's content
+LISTING_EVENTS = {"created", "deleted", "moved"}
+CONTENT_EVENTS = {"created", "deleted", "moved", "modified", "closed"}
+# Filesystems whose changes made on other hosts never reach inotify; directories on them are polled
+NETWORK_FILESYSTEMS = {"nfs", "nfs4", "cifs", "smb3", "smbfs", "9p", "afs", "ceph", "glusterfs", "lustre", "davfs",
+                       "fuse.sshfs", "fuse.rclone", "fuse.s3fs", "fuse.gcsfuse", "fuse.glusterfs"}
+
+
+def _signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def filesystem_type(path):
+    """Type of the filesystem holding `path`, from /proc/mounts, or None where that is unavailable."""
+    try:
+        with open("/proc/mounts") as f:
+            mounts = [line.split()[1:3] for line in f]
+    except OSError:
+        return None
+    path = os.path.realpath(path)
+    best, fstype = None, None
+    for mount_point, kind in mounts:
+        mount_point = mount_point.replace("\\040", " ")
+        inside = path == mount_point or path.startswith(mount_point.rstrip("/") + "/")
+        # The longest mount point wins; of equal ones, the later mount hides the earlier
+        if inside and (best is None or len(mount_point) >= len(best)):
+            best, fstype = mount_point, kind
+    return fstype
+
+
+class _EventHandler(FileSystemEventHandler):
+    def __init__(self, watcher):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        paths = [event.src_path, getattr(event, "dest_path", "")]
+        for path in paths:
+            if path:
+                self.watcher._on_event(os.fsdecode(path), event.event_type)
+
+
+class FileSystemWatcher:
+    """Filesystem watcher shared by every explorer session of the server.
+
+    Only what live sessions show is watched: each session reports its open
+    directory and file with show(), at least every `lease` seconds, and paths no
+    live session shows are unwatched. Directories on local filesystems are watched
+    with inotify through watchdog when it is available, up to `max_native` of them,
+    since every watch costs an inotify instance (a small per-user limit that
+    Streamlit's own source watcher shares) and two threads. Other directories,
+    including those on network filesystems where inotify never sees remote changes,
+    have their mtimes polled. Each watched path carries a generation that changes
+    on change, so sessions detect changes with a dictionary lookup.
+    """
+
+    def __init__(self, on_dir_change=None, poll_interval=2.0, lease=30.0, max_native=32):
+        self.on_dir_change = on_dir_change
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.max_native = max_native
+        self.native = Observer is not None
+        # Generations are never reused, so a path watched again never looks unchanged
+        self._next_generation = itertools.count(1)
+        self._generations = {}  # watched path -> generation
+        self._sessions = {}  # session key -> (dirs, files, last report)
+        self._watched_dirs = set()
+        self._watched_files = set()
+        self._native_dirs = {}  # dir -> watchdog watch
+        self._polled = {}  # path -> last signature
+        self._lock = threading.Lock()
+        # Serializes watch changes, which run outside _lock: watchdog delivers events holding
+        # its own lock, and the handler then takes _lock
+        self._update_lock = threading.Lock()
+        if self.native:
+            self._observer = Observer()
+            self._observer.daemon = True
+            self._observer.start()
+            self._handler = _EventHandler(self)
+        threading.Thread(target=self._poll_loop, name="fs-watcher-poll", daemon=True).start()
+
+    def generation(self, path):
+        """Change counter of a watched path."""
+        return self._generations.get(os.path.abspath(path), 0)
+
+    def is_native(self, directory):
+        """Whether inotify reports changes to a directory, so its cached listing stays valid longer."""
+        return os.path.abspath(directory) in self._native_dirs
+
+    def show(self, session_key, dirs=(), files=()):
+        """Record what a session shows; the watches follow the union over live sessions."""
+        dirs = frozenset(os.path.abspath(d) for d in dirs)
+        files = frozenset(os.path.abspath(f) for f in files)
+        with self._lock:
+            previous = self._sessions.get(session_key)
+            self._sessions[session_key] = (dirs, files, time.monotonic())
+            if previous is not None and previous[:2] == (dirs, files):
+                return
+        self._update()
+
+    def _update(self):
+        """Drop sessions past their lease and watch exactly what the others show."""
+        with self._update_lock:
+            now = time.monotonic()
+            with self._lock:
+                for key in [k for k, (_, _, seen) in self._sessions.items() if now - seen > self.lease]:
+                    del self._sessions[key]
+                files = set().union(*(f for _, f, _ in self._sessions.values()))
+                # A file is watched through its directory
+                dirs = set().union(*(d for d, _, _ in self._sessions.values()), map(os.path.dirname, files))
+                dropped = [self._native_dirs.pop(d) for d in list(self._native_dirs) if d not in dirs]
+                for path in [p for p in self._generations if p not in dirs and p not in files]:
+                    del self._generations[path]
+                    self._polled.pop(path, None)
+                added = dirs - self._watched_dirs
+                for path in added | (files - self._watched_files):
+                    self._generations[path] = next(self._next_generation)
+                self._watched_dirs, self._watched_files = dirs, files
+
+            for watch in dropped:
+                self._observer.unschedule(watch)
+            native = {}
+            for directory in sorted(added):
+                if (self.native and len(self._native_dirs) + len(native) < self.max_native
+                        and filesystem_type(directory) not in NETWORK_FILESYSTEMS):
+                    try:
+                        native[directory] = self._observer.schedule(self._handler, directory, recursive=False)
+                    except OSError:
+                        pass
+
+            with self._lock:
+                self._native_dirs.update(native)
+                for directory in added - native.keys():
+                    self._polled[directory] = _signature(directory)
+                for path in files:
+                    if os.path.dirname(path) not in self._native_dirs and path not in self._polled:
+                        self._polled[path] = _signature(path)
+
+    def _on_event(self, path, event_type):
+        directory = os.path.dirname(path)
+        with self._lock:
+            if event_type in CONTENT_EVENTS and path in self._watched_files:
+                self._generations[path] = next(self._next_generation)
+            if event_type in LISTING_EVENTS and directory in self._native_dirs:
+                self._generations[directory] = next(self._next_generation)
+            else:
+                return
+        if self.on_dir_change is not None:
+            self.on_dir_change(directory)
+
+    def _poll_loop(self):
+        while True:
+            time.sleep(self.poll_interval)
+            now = time.monotonic()
+            with self._lock:
+                expired = any(now - seen > self.lease for _, _, seen in self._sessions.values())
+                polled = list(self._polled.items())
+            if expired:
+                self._update()
+            for path, signature in polled:
+                current = _signature(path)
+                if current == signature:
+                    continue
+                with self._lock:
+                    if path not in self._polled:
+                        continue
+                    self._polled[path] = current
+                    self._generations[path] = next(self._next_generation)
+                    is_dir = path in self._watched_dirs
+                if is_dir and self.on_dir_change is not None:
+                    self.on_dir_change(path)
@@ -0,0 +1,115 @@
+import os
+from array import array
+
+from change_tracker import new_digest
+from file_saver import FileSnapshot, atomic_replace
+
+# Files above this size are opened in windowed large-file mode
+LARGE_FILE_THRESHOLD = 5 * 1024 * 1024
+WINDOW_LINES = 500
+COPY_CHUNK = 1024 * 1024
+
+
+def _copy_range(fd, begin, end):
+    """Yield the bytes [begin, end) of an open file in fixed-size chunks."""
+    pos = begin
+    while pos < end:
+        chunk = os.pread(fd, min(COPY_CHUNK, end - pos), pos)
+        if not chunk:
+            return
+        yield chunk
+        pos += len(chunk)
+
+
+class LargeTextFile:
+    """Large text file exposing windows of lines for viewing and editing.
+
+    Only the requested line ranges are ever read and decoded, with os.pread after
+    re-checking the file's size and mtime: a file truncated or replaced underneath
+    (e.g. by logrotate's copytruncate) just marks the line index `stale`, instead
+    of faulting like a read through a memory map would. Saving a window rewrites
+    the file through atomic_replace, refused if the file changed since it was indexed.
+    """
+
+    def __init__(self, path, encoding="utf-8"):
+        self.path = path
+        self.encoding = encoding
+        self._line_starts = array("Q", [0])
+        self.size = 0
+        self.snapshot = None
+        self.stale = False
+        self.reload()
+
+    def reload(self):
+        """Rebuild the line index and snapshot from the file as it is now."""
+        with open(self.path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            digest = new_digest()
+            self._scan(f.fileno(), 0, digest)
+        self.snapshot = FileSnapshot(stat.st_mtime_ns, self.size, digest.digest())
+        self.stale = False
+
+    def _scan(self, fd, from_line, digest=None):
+        """Rebuild the line index from the given line onwards, reading to the end of the file."""
+        del self._line_starts[from_line + 1:]
+        pos = self._line_starts[from_line]
+        for chunk in _copy_range(fd, pos, os.fstat(fd).st_size):
+            if digest is not None:
+                digest.update(chunk)
+            i = chunk.find(b"\n")
+            while i != -1:
+                self._line_starts.append(pos + i + 1)
+                i = chunk.find(b"\n", i + 1)
+            pos += len(chunk)
+        self.size = pos
+        # A trailing newline does not start another line
+        if len(self._line_starts) > 1 and self._line_starts[-1] >= self.size:
+            self._line_starts.pop()
+
+    @property
+    def line_count(self):
+        return len(self._line_starts)
+
+    def _span(self, start, count):
+        """Byte range covering `count` lines from line `start` (0-based)."""
+        start = min(max(start, 0), self.line_count - 1)
+        end = start + count
+        begin = self._line_starts[start]
+        finish = self._line_starts[end] if end < self.line_count else self.size
+        return start, begin, finish
+
+    def read_lines(self, start, count=WINDOW_LINES):
+        """Decode a window of lines without touching the rest of the file."""
+        start, begin, finish = self._span(start, count)
+        fd = os.open(self.path, os.O_RDONLY)
+        try:
+            stat = os.fstat(fd)
+            if (stat.st_mtime_ns, stat.st_size) != (self.snapshot.mtime_ns, self.snapshot.size):
+                self.stale = True
+            # Past the current end of a shrunk file pread just returns fewer bytes
+            data = b"".join(_copy_range(fd, begin, min(finish, stat.st_size)))
+        finally:
+            os.close(fd)
+        return data.decode(self.encoding, errors="replace")
+
+    def replace_lines(self, start, count, text):
+        """Write `text` over a window of lines and return the new snapshot.
+
+        Raises SaveConflictError if the file changed on disk since it was indexed.
+        """
+        start, begin, finish = self._span(start, count)
+        data = text.encode(self.encoding)
+        old_size = self.size
+
+        def chunks():
+            # Runs after the conflict check, so the indexed offsets still hold
+            with open(self.path, "rb") as f:
+                yield from _copy_range(f.fileno(), 0, begin)
+                yield data
+                yield from _copy_range(f.fileno(), finish, old_size)
+
+        self.snapshot = atomic_replace(self.path, chunks(), self.snapshot)
+        with open(self.path, "rb") as f:
+            self._scan(f.fileno(), start)
+        self.stale = False
+        return self.snapshot
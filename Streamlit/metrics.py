@@ -0,0 +1,112 @@
+import bisect
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds, in seconds, of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _format_value(value):
+    """A sample value at full precision: integers exactly, floats by repr."""
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+class ExplorerMetrics:
+    """Process-wide latency histograms and counters for the explorer.
+
+    Phases (listing, read, validate, save, render) are timed into one histogram
+    each; counters track sizes such as bytes read from storage and bytes of
+    content sent to the browser. Everything renders as Prometheus text.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = defaultdict(lambda: [0] * (len(LATENCY_BUCKETS) + 1))  # phase -> counts per bucket
+        self._sums = defaultdict(float)
+        self._counters = defaultdict(int)  # (name, ((label, value), ...)) -> value
+        self._server = None
+
+    def observe(self, phase, seconds):
+        """Record one timing of a phase."""
+        index = bisect.bisect_left(LATENCY_BUCKETS, seconds)
+        with self._lock:
+            self._buckets[phase][index] += 1
+            self._sums[phase] += seconds
+
+    def add(self, name, amount=1, **labels):
+        """Increase a counter, e.g. add("explorer_sent_bytes_total", 512, pane="editor")."""
+        with self._lock:
+            self._counters[name, tuple(sorted(labels.items()))] += amount
+
+    @contextmanager
+    def timer(self, phase, timings=None):
+        """Time a block as `phase`, also storing its milliseconds in `timings` (e.g. a session's dict)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.observe(phase, elapsed)
+            if timings is not None:
+                timings[phase] = elapsed * 1000
+
+    def summary(self):
+        """{phase: (count, mean milliseconds)} across every session of the process."""
+        with self._lock:
+            return {phase: (sum(counts), self._sums[phase] / sum(counts) * 1000)
+                    for phase, counts in self._buckets.items()}
+
+    def counters(self):
+        with self._lock:
+            return dict(self._counters)
+
+    def render_prometheus(self):
+        """All metrics in the Prometheus text exposition format."""
+        lines = ["# TYPE explorer_phase_seconds histogram"]
+        with self._lock:
+            for phase, counts in sorted(self._buckets.items()):
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS + (float("inf"),), counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'explorer_phase_seconds_bucket{{phase="{phase}",le="{le}"}} {cumulative}')
+                lines.append(f'explorer_phase_seconds_sum{{phase="{phase}"}} {self._sums[phase]}')
+                lines.append(f'explorer_phase_seconds_count{{phase="{phase}"}} {cumulative}')
+            typed = set()
+            for (name, labels), value in sorted(self._counters.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} counter")
+                    typed.add(name)
+                label_text = "{" + ",".join(f'{key}="{label}"' for key, label in labels) + "}" if labels else ""
+                lines.append(f"{name}{label_text} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port, host="127.0.0.1"):
+        """Serve render_prometheus() at /metrics from a background thread."""
+        if self._server is not None:
+            return
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.render_prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="explorer-metrics", daemon=True).start()
@@ -0,0 +1,27 @@
+import math
+
+PAGE_SIZES = (25, 50, 100, 200)
+
+
+def filter_names(names, query):
+    """Keep the names containing the query, ignoring case."""
+    if not query:
+        return names
+    query = query.casefold()
+    return tuple(name for name in names if query in name.casefold())
+
+
+def paginate(dirs, files, page, page_size):
+    """Slice one page out of the folders-then-files listing.
+
+    Returns (page_dirs, page_files, page, page_count) with `page` clamped to the
+    valid range, without concatenating the two listings.
+    """
+    total = len(dirs) + len(files)
+    page_count = max(1, math.ceil(total / page_size))
+    page = min(max(page, 0), page_count - 1)
+    start = page * page_size
+    end = start + page_size
+    page_dirs = dirs[start:end]
+    page_files = files[max(0, start - len(dirs)):max(0, end - len(dirs))]
+    return page_dirs, page_files, page, page_count
@@ -0,0 +1,120 @@
+import codecs
+import struct
+from dataclasses import dataclass, field
+
+# Bytes read from the start of a file to decide how to open it
+SNIFF_BYTES = 8 * 1024
+# Bytes shown in the hex preview of a binary file
+HEX_PREVIEW_BYTES = 512
+# Encodings whose newlines are single b"\n" bytes, so large files can be indexed by line
+LINE_MAPPABLE_ENCODINGS = {"utf-8", "latin-1"}
+
+MAGIC_NUMBERS = [
+    (b"SQLite format 3\x00", "SQLite database"),
+    (b"\x89PNG\r\n\x1a\n", "PNG image"),
+    (b"\xff\xd8\xff", "JPEG image"),
+    (b"GIF87a", "GIF image"),
+    (b"GIF89a", "GIF image"),
+    (b"%PDF-", "PDF document"),
+    (b"PK\x03\x04", "ZIP archive"),
+    (b"PK\x05\x06", "ZIP archive"),
+    (b"\x1f\x8b", "gzip archive"),
+    (b"\x7fELF", "ELF executable"),
+]
+
+# UTF-32 first: its little-endian BOM starts with the UTF-16 one
+BOMS = [
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
+# Control bytes that plain text does contain
+TEXT_CONTROLS = {ord(c) for c in "\t\n\r\f\b\x1b"}
+
+
+@dataclass(frozen=True)
+class Sniff:
+    """What the head of a file says about how to open it."""
+    is_binary: bool
+    encoding: str | None
+    description: str
+    details: dict = field(default_factory=dict)
+
+
+def _binary_details(kind, head):
+    """Cheap metadata parsed from the header of a known binary format."""
+    try:
+        if kind == "SQLite database":
+            page_size, = struct.unpack(">H", head[16:18])
+            page_size = 65536 if page_size == 1 else page_size
+            page_count, = struct.unpack(">I", head[28:32])
+            return {"Page size": page_size, "Pages": page_count}
+        if kind == "PNG image":
+            width, height = struct.unpack(">II", head[16:24])
+            return {"Dimensions": f"{width} × {height}"}
+        if kind == "GIF image":
+            width, height = struct.unpack("<HH", head[6:10])
+            return {"Dimensions": f"{width} × {height}"}
+        if kind == "PDF document":
+            return {"Version": head[5:8].decode("ascii", errors="replace")}
+        if kind == "ELF executable":
+            return {"Class": {1: "32-bit", 2: "64-bit"}.get(head[4], "unknown"),
+                    "Byte order": {1: "little-endian", 2: "big-endian"}.get(head[5], "unknown")}
+    except struct.error:
+        pass
+    return {}
+
+
+def _utf16_without_bom(head):
+    """Guess UTF-16 byte order from NULs falling on every other byte, as in mostly-ASCII text."""
+    even_nuls = head[0::2].count(0)
+    odd_nuls = head[1::2].count(0)
+    half = len(head) // 2
+    if half and odd_nuls > 0.9 * half and even_nuls < 0.1 * half:
+        return "utf-16-le"
+    if half and even_nuls > 0.9 * half and odd_nuls < 0.1 * half:
+        return "utf-16-be"
+    return None
+
+
+def sniff(head):
+    """Classify a file from its first bytes: magic numbers, BOMs, NUL density and decodability."""
+    for magic, kind in MAGIC_NUMBERS:
+        if head.startswith(magic):
+            return Sniff(True, None, kind, _binary_details(kind, head))
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return Sniff(False, encoding, f"{encoding.upper()} text")
+    if not head:
+        return Sniff(False, "utf-8", "Empty file")
+
+    if b"\0" in head:
+        encoding = _utf16_without_bom(head)
+        if encoding is not None:
+            return Sniff(False, encoding, f"{encoding.upper()} text")
+        return Sniff(True, None, "Binary data", {"NUL bytes in first KB": head[:1024].count(0)})
+
+    try:
+        # Not final: the sniffed head may end in the middle of a character
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+        return Sniff(False, "utf-8", "UTF-8 text")
+    except UnicodeDecodeError:
+        pass
+    controls = sum(1 for byte in head if byte < 0x20 and byte not in TEXT_CONTROLS)
+    if controls > 0.05 * len(head):
+        return Sniff(True, None, "Binary data")
+    return Sniff(False, "latin-1", "Latin-1 text")
+
+
+def hex_dump(data, offset=0):
+    """Classic 16-bytes-per-row hex dump with an ASCII column."""
+    rows = []
+    for start in range(0, len(data), 16):
+        chunk = data[start:start + 16]
+        hex_part = " ".join(f"{byte:02x}" for byte in chunk)
+        text_part = "".join(chr(byte) if 0x20 <= byte < 0x7f else "." for byte in chunk)
+        rows.append(f"{offset + start:08x}  {hex_part:<47}  |{text_part}|")
+    return "\n".join(rows)
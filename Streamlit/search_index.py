@@ -0,0 +1,175 @@
+import bisect
+import os
+import threading
+import time
+from collections import defaultdict
+
+from dir_listing import scan_dir
+
+# Directories that are never worth descending into
+SKIP_DIRS = {".git", "__pycache__", "node_modules", ".venv", "venv", ".mypy_cache", ".pytest_cache"}
+
+
+def trigrams(text):
+    """Set of lower-cased character trigrams in `text`."""
+    text = text.casefold()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class SearchIndex:
+    """Recursive file-name index, plus an optional trigram content index, under one root.
+
+    The index is built on a background thread and refreshed incrementally:
+    directories are only rescanned when their mtime changed, and file contents
+    only re-tokenised when the file's mtime or size changed.
+    """
+
+    def __init__(self, root, index_contents=False, max_files=100_000, max_file_size=256 * 1024,
+                 refresh_interval=30.0):
+        self.root = root
+        self.index_contents = index_contents
+        self.max_files = max_files
+        self.max_file_size = max_file_size
+        self.refresh_interval = refresh_interval
+        self.ready = False
+        self.truncated = False
+        self._dirs = {}  # dir -> (mtime_ns, subdirs, files)
+        self._paths = []  # relative file paths, in walk order
+        self._blob = ""  # lower-cased paths joined by newlines
+        self._offsets = []  # start of each path in the blob
+        self._file_keys = {}  # path -> (mtime_ns, size) of the indexed content
+        self._file_trigrams = {}  # path -> trigrams of its content
+        self._postings = defaultdict(set)  # trigram -> paths containing it
+        self._lock = threading.Lock()
+        self._thread = None
+        self._refreshed_at = None
+
+    def refresh(self, force=False):
+        """Start a background refresh unless one is running or the index is fresh."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            if not force and self._refreshed_at is not None \
+                    and time.monotonic() - self._refreshed_at < self.refresh_interval:
+                return
+            self._thread = threading.Thread(target=self._refresh, name="search-index", daemon=True)
+            self._thread.start()
+
+    def _refresh(self):
+        dirs, paths = {}, []
+        stack = [self.root]
+        truncated = False
+        while stack:
+            directory = stack.pop()
+            try:
+                mtime_ns = os.stat(directory).st_mtime_ns
+                cached = self._dirs.get(directory)
+                if cached is not None and cached[0] == mtime_ns:
+                    entry = cached
+                else:
+                    entry = (mtime_ns, *scan_dir(directory))
+            except OSError:
+                continue
+            dirs[directory] = entry
+            for name in entry[2]:
+                paths.append(os.path.relpath(os.path.join(directory, name), self.root))
+            if len(paths) >= self.max_files:
+                truncated = True
+                break
+            stack.extend(os.path.join(directory, d) for d in reversed(entry[1]) if d not in SKIP_DIRS)
+
+        # Case folding can change lengths, so offsets come from the folded paths
+        folded = [path.casefold() for path in paths]
+        offsets, position = [], 0
+        for path in folded:
+            offsets.append(position)
+            position += len(path) + 1
+        blob = "\n".join(folded)
+        with self._lock:
+            self._dirs, self._paths, self._blob, self._offsets = dirs, paths, blob, offsets
+            self.truncated = truncated
+
+        if self.index_contents:
+            self._refresh_contents(paths)
+        with self._lock:
+            self.ready = True
+            self._refreshed_at = time.monotonic()
+
+    def _refresh_contents(self, paths):
+        live = set(paths)
+        with self._lock:
+            for path in [p for p in self._file_keys if p not in live]:
+                self._drop_content(path)
+        for path in paths:
+            full_path = os.path.join(self.root, path)
+            try:
+                stat = os.stat(full_path)
+                key = (stat.st_mtime_ns, stat.st_size)
+                if self._file_keys.get(path) == key:
+                    continue
+                grams = set()
+                if stat.st_size <= self.max_file_size:
+                    with open(full_path, "rb") as f:
+                        data = f.read()
+                    if b"\0" not in data:
+                        grams = trigrams(data.decode("utf-8", errors="replace"))
+            except OSError:
+                continue
+            with self._lock:
+                self._drop_content(path)
+                self._file_keys[path] = key
+                self._file_trigrams[path] = grams
+                for gram in grams:
+                    self._postings[gram].add(path)
+
+    def _drop_content(self, path):
+        for gram in self._file_trigrams.pop(path, ()):
+            postings = self._postings.get(gram)
+            if postings is not None:
+                postings.discard(path)
+                if not postings:
+                    del self._postings[gram]
+        self._file_keys.pop(path, None)
+
+    @property
+    def file_count(self):
+        return len(self._paths)
+
+    def search_names(self, query, limit=50):
+        """Relative paths whose path contains `query`, ignoring case."""
+        query = query.casefold()
+        if not query or "\n" in query:
+            return []
+        with self._lock:
+            blob, offsets, paths = self._blob, self._offsets, self._paths
+        results = []
+        position = blob.find(query)
+        while position != -1 and len(results) < limit:
+            index = bisect.bisect_right(offsets, position) - 1
+            results.append(paths[index])
+            # Skip to the next path so one path is not reported twice
+            next_start = offsets[index + 1] if index + 1 < len(offsets) else len(blob)
+            position = blob.find(query, next_start)
+        return results
+
+    def search_content(self, query, limit=50):
+        """Relative paths of indexed files whose content contains `query`, ignoring case."""
+        grams = trigrams(query)
+        if not self.index_contents or not grams:
+            return []
+        with self._lock:
+            postings = sorted((self._postings.get(gram, set()) for gram in grams), key=len)
+            candidates = set.intersection(*postings) if postings else set()
+        needle = query.casefold()
+        results = []
+        for path in sorted(candidates):
+            # Trigrams only narrow the candidates; confirm the actual match
+            try:
+                with open(os.path.join(self.root, path), "r", encoding="utf-8", errors="replace") as f:
+                    if needle in f.read().casefold():
+                        results.append(path)
+            except OSError:
+                continue
+            if len(results) >= limit:
+                break
+        return results
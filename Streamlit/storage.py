@@ -0,0 +1,283 @@
+import io
+import os
+import posixpath
+import tarfile
+import threading
+import time
+import zipfile
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from urllib.parse import quote, unquote
+
+from change_tracker import bytes_digest
+from file_saver import FileSnapshot, SaveConflictError, atomic_write
+
+
+class ReadOnlyStorageError(Exception):
+    """The storage backend does not accept writes."""
+
+
+@dataclass(frozen=True)
+class FileInfo:
+    """Metadata of one file, as returned by a batched stat."""
+    size: int
+    mtime_ns: int
+
+
+def decode_text(data, encoding="utf-8", errors="strict"):
+    """Decode bytes the way text-mode open() would, universal newlines included."""
+    return io.TextIOWrapper(io.BytesIO(data), encoding=encoding, errors=errors).read()
+
+
+class StorageBackend(ABC):
+    """Where the explorer lists, reads and writes files.
+
+    Backends answer a directory listing and a batch of stats from as few calls as
+    they can, and read byte ranges so previews never fetch whole files.
+    """
+
+    # Local backends unlock memory-mapping, watching and search in the explorer
+    is_local = False
+    read_only = False
+
+    def __init__(self, root):
+        self.root = root
+
+    def parent(self, path):
+        return posixpath.dirname(path) or self.root
+
+    def join(self, directory, name):
+        return posixpath.join(directory, name)
+
+    @abstractmethod
+    def list_dir(self, directory):
+        """Return sorted (dirs, files) name tuples for a directory."""
+
+    @abstractmethod
+    def stat_many(self, paths):
+        """Return {path: FileInfo} for the given files in one batched lookup."""
+
+    def stat(self, path):
+        return self.stat_many([path])[path]
+
+    @abstractmethod
+    def read_range(self, path, start, end):
+        """Read the bytes in [start, end) of a file."""
+
+    def read_text(self, path, encoding="utf-8"):
+        """Return (content, snapshot) for a whole text file."""
+        info = self.stat(path)
+        data = self.read_range(path, 0, info.size)
+        return decode_text(data, encoding), FileSnapshot(info.mtime_ns, len(data), bytes_digest(data))
+
+    def write_text(self, path, content, expected=None, encoding="utf-8"):
+        """Replace a file's content, refusing if it no longer matches `expected`."""
+        raise ReadOnlyStorageError(f"{self.describe()} is read-only")
+
+    def describe(self):
+        return type(self).__name__
+
+
+class LocalStorage(StorageBackend):
+    """The local filesystem, with shared listing and content caches."""
+
+    is_local = True
+
+    def __init__(self, listing_cache, content_cache, root=None):
+        super().__init__(root or os.getcwd())
+        self.listing_cache = listing_cache
+        self.content_cache = content_cache
+
+    def parent(self, path):
+        return os.path.dirname(path)
+
+    def join(self, directory, name):
+        return os.path.join(directory, name)
+
+    def list_dir(self, directory):
+        return self.listing_cache.list_dir(directory)
+
+    def stat_many(self, paths):
+        infos = {}
+        for path in paths:
+            stat = os.stat(path)
+            infos[path] = FileInfo(stat.st_size, stat.st_mtime_ns)
+        return infos
+
+    def read_range(self, path, start, end):
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            return os.pread(fd, max(0, end - start), start)
+        finally:
+            os.close(fd)
+
+    def read_text(self, path, encoding="utf-8"):
+        return self.content_cache.read(path, encoding)
+
+    def write_text(self, path, content, expected=None, encoding="utf-8"):
+        snapshot = atomic_write(path, content, expected, encoding)
+        self.content_cache.put(path, content, snapshot)
+        return snapshot
+
+    def describe(self):
+        return "Local filesystem"
+
+
+class _TreeStorage(StorageBackend):
+    """Backend whose whole namespace is fetched in one call and browsed from memory."""
+
+    def __init__(self):
+        super().__init__("/")
+        self._infos = {}
+        self._listings = {}
+
+    def _build(self, infos):
+        """Index {path: FileInfo} into per-directory listings."""
+        children = {"/": (set(), [])}
+        for path in infos:
+            directory, name = posixpath.split(path)
+            children.setdefault(directory, (set(), []))[1].append(name)
+            # Make sure every ancestor lists the directory below it
+            while directory != "/":
+                parent, dirname = posixpath.split(directory)
+                entry = children.setdefault(parent, (set(), []))
+                if dirname in entry[0]:
+                    break
+                entry[0].add(dirname)
+                directory = parent
+        self._infos = infos
+        self._listings = {d: (tuple(sorted(dirs)), tuple(sorted(files))) for d, (dirs, files) in children.items()}
+
+    def list_dir(self, directory):
+        try:
+            return self._listings[directory]
+        except KeyError:
+            raise FileNotFoundError(directory)
+
+    def stat_many(self, paths):
+        try:
+            return {path: self._infos[path] for path in paths}
+        except KeyError as e:
+            raise FileNotFoundError(e.args[0])
+
+
+class ArchiveStorage(_TreeStorage):
+    """Read-only browsing of a zip or tar archive.
+
+    The member table is read once; listings and stats are then answered from
+    memory and reads only touch the requested member.
+    """
+
+    read_only = True
+
+    def __init__(self, archive_path):
+        super().__init__()
+        self.archive_path = archive_path
+        self._lock = threading.Lock()
+        self._members = {}
+        if zipfile.is_zipfile(archive_path):
+            self._archive = zipfile.ZipFile(archive_path)
+            infos = {}
+            for member in self._archive.infolist():
+                if member.is_dir():
+                    continue
+                path = posixpath.normpath("/" + member.filename)
+                mtime_ns = int(time.mktime(member.date_time + (0, 0, -1)) * 1e9)
+                infos[path] = FileInfo(member.file_size, mtime_ns)
+                self._members[path] = member
+        else:
+            self._archive = tarfile.open(archive_path)
+            infos = {}
+            for member in self._archive.getmembers():
+                if not member.isfile():
+                    continue
+                # "./.env" is "/.env": normalize the path, don't strip characters
+                path = posixpath.normpath("/" + member.name)
+                infos[path] = FileInfo(member.size, int(member.mtime * 1e9))
+                self._members[path] = member
+        self._build(infos)
+
+    def read_range(self, path, start, end):
+        member = self._members[path]
+        with self._lock:
+            if isinstance(self._archive, zipfile.ZipFile):
+                stream = self._archive.open(member)
+            else:
+                stream = self._archive.extractfile(member)
+            with stream:
+                stream.seek(start)
+                return stream.read(max(0, end - start))
+
+    def describe(self):
+        return f"Archive {os.path.basename(self.archive_path)}"
+
+
+class ObjectStorage(_TreeStorage):
+    """Local stand-in for an object store bucket.
+
+    Objects live as flat files in one directory, named by their URL-quoted key.
+    The bucket is listed in one pass (like a paginated ListObjects call), and
+    '/'-delimited keys are presented as folders. Reads are range GETs, writes
+    whole-object PUTs guarded by the snapshot taken when the object was read.
+    """
+
+    def __init__(self, bucket_dir, list_ttl=5.0):
+        super().__init__()
+        self.bucket_dir = bucket_dir
+        self.list_ttl = list_ttl
+        self._listed_at = None
+        self._lock = threading.Lock()
+
+    def _object_path(self, path):
+        return os.path.join(self.bucket_dir, quote(path.lstrip("/"), safe=""))
+
+    def _refresh(self, force=False):
+        with self._lock:
+            if not force and self._listed_at is not None and time.monotonic() - self._listed_at < self.list_ttl:
+                return
+            infos = {}
+            with os.scandir(self.bucket_dir) as entries:
+                for entry in entries:
+                    if entry.is_file() and not entry.name.startswith("."):
+                        stat = entry.stat()
+                        infos["/" + unquote(entry.name)] = FileInfo(stat.st_size, stat.st_mtime_ns)
+            self._build(infos)
+            self._listed_at = time.monotonic()
+
+    def list_dir(self, directory):
+        self._refresh()
+        return super().list_dir(directory)
+
+    def stat_many(self, paths):
+        self._refresh()
+        return super().stat_many(paths)
+
+    def read_range(self, path, start, end):
+        fd = os.open(self._object_path(path), os.O_RDONLY)
+        try:
+            return os.pread(fd, max(0, end - start), start)
+        finally:
+            os.close(fd)
+
+    def write_text(self, path, content, expected=None, encoding="utf-8"):
+        object_path = self._object_path(path)
+        try:
+            snapshot = atomic_write(object_path, content, expected, encoding)
+        except SaveConflictError:
+            raise SaveConflictError(f"{path} was changed in the bucket after it was opened")
+        self._refresh(force=True)
+        return snapshot
+
+    def describe(self):
+        return f"Object bucket {os.path.basename(os.path.normpath(self.bucket_dir))}"
+
+
+def storage_from_env(listing_cache, content_cache):
+    """Pick the backend named by EXPLORER_STORAGE: local (default), archive:<path> or objects:<dir>."""
+    spec = os.environ.get("EXPLORER_STORAGE", "local")
+    kind, _, location = spec.partition(":")
+    if kind == "archive":
+        return ArchiveStorage(location)
+    if kind == "objects":
+        return ObjectStorage(location)
+    return LocalStorage(listing_cache, content_cache)
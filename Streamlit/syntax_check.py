@@ -0,0 +1,109 @@
+import ast
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from change_tracker import content_digest
+
+
+def check_syntax(code):
+    """Return the syntax error message for `code`, or None if it parses."""
+    try:
+        ast.parse(code)
+        return None
+    except SyntaxError as e:
+        return str(e)
+
+
+class SyntaxValidator:
+    """Validates Python source on a worker pool, caching diagnostics by content digest.
+
+    Submissions are debounced per session with a timer: a newer submission from
+    the same session cancels the pending one, and only a timer that fires hands
+    its code to the pool, so superseded edits never occupy a worker. A session
+    is only tracked while it has a check scheduled. Parses are timed as the
+    "validate" phase when `metrics` is given.
+    """
+
+    def __init__(self, max_workers=2, debounce=0.3, max_cached=512, metrics=None):
+        self.debounce = debounce
+        self.max_cached = max_cached
+        self.metrics = metrics
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="syntax-check")
+        self._results = OrderedDict()  # digest -> error message or None
+        self._pending = set()  # digests scheduled or being parsed
+        self._running = set()  # digests handed to the pool
+        self._timers = {}  # session key -> (digest, Timer) of its scheduled check
+        self._lock = threading.Lock()
+
+    def submit(self, session_key, code):
+        """Schedule validation of `code` for a session and return its digest."""
+        digest = content_digest(code)
+        with self._lock:
+            previous = self._timers.pop(session_key, None)
+            if previous is not None:
+                previous[1].cancel()
+                self._forget(previous[0])
+            if digest in self._results or digest in self._running:
+                return digest
+            self._pending.add(digest)
+            timer = threading.Timer(self.debounce, self._fire, (session_key, digest, code))
+            timer.daemon = True
+            self._timers[session_key] = (digest, timer)
+        timer.start()
+        return digest
+
+    def _forget(self, digest):
+        """Drop a superseded digest from the pending set unless another session still waits for it."""
+        if digest not in self._running and all(d != digest for d, _ in self._timers.values()):
+            self._pending.discard(digest)
+
+    def _fire(self, session_key, digest, code):
+        with self._lock:
+            entry = self._timers.get(session_key)
+            # Runs on the Timer's own thread; a replaced timer may fire before its cancel lands
+            if entry is None or entry[1] is not threading.current_thread():
+                return
+            del self._timers[session_key]
+            if digest in self._results or digest in self._running:
+                return
+            self._running.add(digest)
+        self._executor.submit(self._validate, digest, code)
+
+    def _validate(self, digest, code):
+        self._store(digest, self._check(code))
+
+    def _check(self, code):
+        if self.metrics is None:
+            return check_syntax(code)
+        with self.metrics.timer("validate"):
+            return check_syntax(code)
+
+    def _store(self, digest, error_msg):
+        with self._lock:
+            self._pending.discard(digest)
+            self._running.discard(digest)
+            self._results[digest] = error_msg
+            while len(self._results) > self.max_cached:
+                self._results.popitem(last=False)
+
+    def knows(self, digest):
+        """Whether `digest` has a cached result or is still being validated."""
+        with self._lock:
+            return digest in self._results or digest in self._pending
+
+    def result(self, digest):
+        """Return (done, error_msg) for a submitted digest."""
+        with self._lock:
+            if digest in self._results:
+                return True, self._results[digest]
+            return False, None
+
+    def validate_now(self, code):
+        """Return the error message for `code`, parsing in the caller only on a cache miss."""
+        digest = content_digest(code)
+        done, error_msg = self.result(digest)
+        if not done:
+            error_msg = self._check(code)
+            self._store(digest, error_msg)
+        return error_msg
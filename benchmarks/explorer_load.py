@@ -0,0 +1,149 @@
+"""Load test for the Streamlit file explorer, driven headlessly with AppTest.
+
+Builds a synthetic tree (a flat directory of many small files plus one large
+log), then times the app through typical interactions: first load, listing and
+paging the big directory, filtering, opening and scrolling the large file, and
+editing a Python file. Each scenario is repeated and reported as p50/p95/max of
+the script rerun time, alongside the app's own per-phase timings and the bytes
+each pane sent.
+
+    python benchmarks/explorer_load.py --files 10000 --big-mb 100
+    python benchmarks/explorer_load.py --save-baseline baseline.json
+    python benchmarks/explorer_load.py --baseline baseline.json   # exits 1 on regression
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from streamlit.testing.v1 import AppTest
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Streamlit", "app.py")
+
+
+def build_tree(root, files, big_mb):
+    """Create root/flat/ with `files` small files, root/src/edit.py and a `big_mb` MB root/big.log."""
+    flat = os.path.join(root, "flat")
+    os.makedirs(flat)
+    for i in range(files):
+        with open(os.path.join(flat, f"file_{i:06d}.txt"), "w") as f:
+            f.write(f"file {i}\n")
+    os.makedirs(os.path.join(root, "src"))
+    with open(os.path.join(root, "src", "edit.py"), "w") as f:
+        f.write("".join(f"value_{i} = {i}\n" for i in range(2000)))
+    line = b"2024-01-01T00:00:00 INFO request handled in 12ms path=/api/items status=200\n"
+    with open(os.path.join(root, "big.log"), "wb") as f:
+        chunk = line * (1024 * 1024 // len(line))
+        for _ in range(big_mb):
+            f.write(chunk)
+
+
+def click(at, label):
+    for button in at.button:
+        if button.label == label:
+            button.click()
+            return at.run()
+    raise LookupError(f"no button {label!r}")
+
+
+def timed(results, name, action):
+    """Run `action` and record its wall time under `name`."""
+    started = time.perf_counter()
+    at = action()
+    results.setdefault(name, []).append((time.perf_counter() - started) * 1000)
+    if at.exception:
+        raise RuntimeError(f"{name}: {at.exception[0].message}")
+    return at
+
+
+def run_session(results, phases, sent):
+    """One simulated user session through every scenario."""
+    at = AppTest.from_file(APP, default_timeout=300)
+    timed(results, "first load", at.run)
+    timed(results, "open flat folder", lambda: click(at, "📂 flat"))
+    timed(results, "next page", lambda: click(at, "Next ▶"))
+    at.text_input(key="name_filter").input("file_0099")
+    timed(results, "filter listing", at.run)
+    timed(results, "back to root", lambda: click(at, "🔙 Go Back"))
+    at.text_input(key="name_filter").input("")
+    at.run()
+    timed(results, "open large file", lambda: click(at, "📄 big.log"))
+    at.number_input(key="window_start").set_value(500_001)
+    timed(results, "scroll large file", at.run)
+    timed(results, "open folder", lambda: click(at, "📂 src"))
+    timed(results, "open python file", lambda: click(at, "📄 edit.py"))
+    editor = at.text_area[0]
+    editor.input(editor.value + "broken = (\n")
+    timed(results, "edit python file", at.run)
+    for phase, ms in at.session_state.phase_timings.items():
+        phases.setdefault(phase, []).append(ms)
+    for pane, size in at.session_state.sent_bytes.items():
+        sent[pane] = max(sent.get(pane, 0), size)
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=10_000, help="files in the flat directory")
+    parser.add_argument("--big-mb", type=int, default=100, help="size of the large file in MB")
+    parser.add_argument("--sessions", type=int, default=5, help="simulated sessions (the first is cold)")
+    parser.add_argument("--baseline", help="JSON from --save-baseline to compare p50s against")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed p50 slowdown vs baseline")
+    parser.add_argument("--save-baseline", help="write p50s to this JSON file")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="explorer-load-")
+    cwd = os.getcwd()
+    try:
+        started = time.perf_counter()
+        build_tree(root, args.files, args.big_mb)
+        print(f"Built {args.files} files + {args.big_mb} MB log in {time.perf_counter() - started:.1f}s at {root}")
+        # The app browses its working directory
+        os.chdir(root)
+
+        results, phases, sent = {}, {}, {}
+        tracemalloc.start()
+        for _ in range(args.sessions):
+            run_session(results, phases, sent)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(root, ignore_errors=True)
+
+    print(f"\n{'scenario':<24}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    p50s = {}
+    for name, times in results.items():
+        p50s[name] = statistics.median(times)
+        print(f"{name:<24}{p50s[name]:>10.1f}{percentile(times, 0.95):>10.1f}{max(times):>10.1f}")
+    print(f"\n{'app phase (last rerun)':<24}{'p50 ms':>10}")
+    for phase, times in phases.items():
+        print(f"{phase:<24}{statistics.median(times):>10.2f}")
+    print("\nLargest payload per pane: " + ", ".join(f"{pane} {size:,} B" for pane, size in sent.items()))
+    print(f"Peak traced memory: {peak / 1024 / 1024:.1f} MB")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(p50s, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = [f"{name}: {p50s[name]:.1f} ms vs {base:.1f} ms" for name, base in baseline.items()
+                       if name in p50s and p50s[name] > base * (1 + args.tolerance)]
+        if regressions:
+            print("\nRegressions:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+        print("\nNo regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
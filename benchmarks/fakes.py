@@ -0,0 +1,278 @@
+"""Offline stand-ins for chat models and retrievers, shared by the benchmarks.
+
+`FakeChatModel` answers from a `respond(messages)` callable after a fixed
+latency (plus an optional per-output-token latency), sleeping with `time.sleep`
+on the sync path and `asyncio.sleep` on the async path, so sync and async
+graphs can be compared without network access. Streaming callers get the same
+text word by word, and every response carries estimated usage_metadata.
+`with_structured_output(schema)` returns whatever `structured(schema, input)`
+builds. After `bind_tools(...)`, `tool_calls(messages, tools)` may return
+[{"name", "args"}] to call tools; when it returns None and the binding forces a
+tool (as Trustcall extractors do), that tool is called with `example_args`
+generated from its JSON schema.
+
+`FakeWebSearch` and `FakeWikipediaLoader` replace TavilySearchResults and
+WikipediaLoader with deterministic documents derived from the query.
+`research_respond` / `research_structured` script the module-4 research
+assistant, with questions and search queries that differ per analyst and topic,
+so interviews only share plans and searches where real ones would.
+"""
+import asyncio
+import json
+import re
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from langchain_core.documents import Document
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import PrivateAttr
+
+
+# Example values for string formats that pydantic validates
+EXAMPLE_FORMATS = {"date-time": "2024-01-01T09:00:00", "date": "2024-01-01", "time": "09:00:00"}
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+def example_args(schema: dict, defs: Optional[dict] = None, depth: int = 0):
+    """A value that validates against a JSON schema: first enum/anyOf option, one array item, every property."""
+    defs = {**(defs or {}), **schema.get("$defs", {})}
+    if "$ref" in schema:
+        return example_args(defs[schema["$ref"].split("/")[-1]], defs, depth)
+    if "enum" in schema:
+        return schema["enum"][0]
+    for key in ("anyOf", "oneOf", "allOf"):
+        if key in schema:
+            options = [option for option in schema[key] if option.get("type") != "null"] or schema[key]
+            return example_args(options[0], defs, depth)
+    kind = schema.get("type", "object")
+    if kind == "object":
+        if depth > 4:
+            return {}
+        return {name: example_args(prop, defs, depth + 1) for name, prop in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [] if depth > 4 else [example_args(schema.get("items", {}), defs, depth + 1)]
+    if kind == "string" and schema.get("format") in EXAMPLE_FORMATS:
+        return EXAMPLE_FORMATS[schema["format"]]
+    return {"string": "example", "integer": 1, "number": 1.0, "boolean": True}.get(kind)
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model that returns canned responses after `latency` seconds."""
+
+    respond: Callable[[list], Any]
+    structured: Optional[Callable[[type, Any], Any]] = None
+    tool_calls: Optional[Callable[[list, list], Optional[list]]] = None
+    latency: float = 0.05
+    latency_per_token: float = 0.0
+    bound_tools: list = []
+    tool_choice: Any = None
+    # Shared with copies made by bind_tools
+    _stats: dict = PrivateAttr(default_factory=lambda: {"calls": 0, "input_tokens": 0, "output_tokens": 0})
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    @property
+    def calls(self) -> int:
+        return self._stats["calls"]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats)
+
+    def _count(self, input_tokens=0, output_tokens=0):
+        with self._lock:
+            self._stats["calls"] += 1
+            self._stats["input_tokens"] += input_tokens
+            self._stats["output_tokens"] += output_tokens
+
+    def bind_tools(self, tools, *, tool_choice=None, **kwargs):
+        return self.model_copy(update={"bound_tools": [convert_to_openai_tool(tool) for tool in tools],
+                                       "tool_choice": tool_choice})
+
+    def _forced_tool(self):
+        choice = self.tool_choice
+        if isinstance(choice, dict):
+            choice = choice.get("function", {}).get("name")
+        names = [tool["function"]["name"] for tool in self.bound_tools]
+        if choice in names:
+            return self.bound_tools[names.index(choice)]
+        if choice in ("any", "required", True) and self.bound_tools:
+            return self.bound_tools[0]
+        return None
+
+    def _message(self, messages):
+        """(AIMessage, delay) for this call."""
+        calls = self.tool_calls(messages, self.bound_tools) if self.tool_calls and self.bound_tools else None
+        if calls is None:
+            forced = self._forced_tool()
+            calls = [] if forced is None else [{"name": forced["function"]["name"],
+                                                "args": example_args(forced["function"]["parameters"])}]
+        if calls:
+            message = AIMessage("", tool_calls=[{"name": call["name"], "args": call["args"], "id": f"call_{i}",
+                                                 "type": "tool_call"} for i, call in enumerate(calls)])
+            output = json.dumps([call["args"] for call in calls])
+        else:
+            message = self.respond(messages)
+            if isinstance(message, str):
+                message = AIMessage(message)
+            output = message.content if isinstance(message.content, str) else json.dumps(message.content)
+        input_tokens = sum(estimate_tokens(str(m.content)) for m in messages)
+        output_tokens = estimate_tokens(output)
+        message.usage_metadata = {"input_tokens": input_tokens, "output_tokens": output_tokens,
+                                  "total_tokens": input_tokens + output_tokens}
+        self._count(input_tokens, output_tokens)
+        return message, self.latency + self.latency_per_token * output_tokens
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        message, delay = self._message(messages)
+        time.sleep(delay)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        message, delay = self._message(messages)
+        await asyncio.sleep(delay)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _chunks(self, message):
+        if message.tool_calls:
+            yield ChatGenerationChunk(message=AIMessageChunk(
+                "", usage_metadata=message.usage_metadata,
+                tool_call_chunks=[{"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"],
+                                   "index": i} for i, call in enumerate(message.tool_calls)]))
+            return
+        words = message.content.split(" ")
+        for i, word in enumerate(words):
+            yield ChatGenerationChunk(message=AIMessageChunk(
+                word if i == 0 else " " + word,
+                usage_metadata=message.usage_metadata if i == len(words) - 1 else None))
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        message, delay = self._message(messages)
+        time.sleep(delay)
+        for chunk in self._chunks(message):
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        message, delay = self._message(messages)
+        await asyncio.sleep(delay)
+        for chunk in self._chunks(message):
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    def with_structured_output(self, schema, **kwargs):
+        if self.structured is None:
+            raise NotImplementedError("pass structured= to build structured outputs")
+
+        def run(prompt):
+            result = self.structured(schema, prompt)
+            output = result.model_dump_json() if hasattr(result, "model_dump_json") else json.dumps(result)
+            self._count(estimate_tokens(str(prompt)), estimate_tokens(output))
+            time.sleep(self.latency + self.latency_per_token * estimate_tokens(output))
+            return result
+
+        async def arun(prompt):
+            result = self.structured(schema, prompt)
+            output = result.model_dump_json() if hasattr(result, "model_dump_json") else json.dumps(result)
+            self._count(estimate_tokens(str(prompt)), estimate_tokens(output))
+            await asyncio.sleep(self.latency + self.latency_per_token * estimate_tokens(output))
+            return result
+
+        return RunnableLambda(run, afunc=arun)
+
+
+class FakeWebSearch:
+    """Stand-in for TavilySearchResults: `max_results` {"url", "content"} results per query."""
+
+    latency = 0.05
+
+    def __init__(self, max_results: int = 3, **kwargs):
+        self.max_results = max_results
+
+    def _results(self, query):
+        slug = re.sub(r"\W+", "-", str(query).lower()).strip("-")
+        return [{"url": f"https://example.com/{slug}/{i}", "content": f"Result {i} for {query}. " * 20}
+                for i in range(self.max_results)]
+
+    def invoke(self, query, config=None, **kwargs):
+        time.sleep(self.latency)
+        return self._results(query)
+
+    async def ainvoke(self, query, config=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        return self._results(query)
+
+
+class FakeWikipediaLoader:
+    """Stand-in for WikipediaLoader: `load_max_docs` Documents per query."""
+
+    latency = 0.05
+
+    def __init__(self, query: str, load_max_docs: int = 2, **kwargs):
+        self.query = query
+        self.load_max_docs = load_max_docs
+
+    def load(self):
+        time.sleep(self.latency)
+        title = self.query.replace(" ", "_")
+        return [Document(page_content=f"Article {i} about {self.query}. " * 40,
+                         metadata={"source": f"https://en.wikipedia.org/wiki/{title}_{i}", "page": ""})
+                for i in range(self.load_max_docs)]
+
+
+def research_respond(messages):
+    """Canned text for each prompt in module-4's research_assistant.py, citing the first source id it was shown."""
+    system = str(messages[0].content)
+    # S1a2b3c is the example id in the prompts
+    ids = [i for i in re.findall(r"S[0-9a-f]{6}", "\n".join(str(m.content) for m in messages)) if i != "S1a2b3c"]
+    cite = f" [{ids[0]}]" if ids else ""
+    if "interviewing an expert" in system:
+        if len(messages) >= 4:
+            return "Thank you so much for your help!"
+        name = re.search(r"Name: (.*)", system)
+        topic = re.search(r"writing an article on (.*)\?", str(messages[1].content))
+        return f"What changed recently in {topic and topic[1]} for {name and name[1]}?"
+    if "expert being interviewed" in system:
+        return f"It got faster{cite}."
+    if "expert technical writer" in system:
+        return f"## Section\n### Summary\nText{cite}"
+    # The three report writers share a system prefix and differ in the request
+    request = str(messages[-1].content)
+    if "Write a report" in request:
+        return f"## Insights\nInsight{cite}"
+    if "introduction" in request:
+        return "# Title\n## Introduction\nIntro"
+    return "## Conclusion\nDone"
+
+
+def research_structured(analysts: int):
+    """Structured outputs for the research assistant: `analysts` analysts, then search queries."""
+    def structured(schema, messages):
+        if schema.__name__ == "Perspectives":
+            analyst = schema.model_fields["analysts"].annotation.__args__[0]
+            return schema(analysts=[analyst(affiliation="Lab", name=f"Analyst {i}", role="Researcher",
+                                            description=f"Focus {i}") for i in range(analysts)])
+        # Queries are built from the analyst's question, the last message of the prompt. The closing thank-you
+        # is the same in every interview, so, like a planner reading the whole conversation, it is searched as
+        # a follow-up to the question before it
+        texts = [str(message.content) for message in messages[1:]]
+        question = texts[-1]
+        if question.startswith("Thank you") and len(texts) > 2:
+            question = f"{texts[-3]} follow-up"
+        if schema.__name__ == "SearchQueries":
+            return schema(search_queries=[f"{question} aspect {i}" for i in range(3)])
+        return schema(search_query=question)
+    return structured
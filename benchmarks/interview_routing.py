@@ -0,0 +1,89 @@
+"""Cost of turn accounting in long research-assistant interviews.
+
+Compares, per interview length, one routing decision and one transcript save
+done the old way (rescanning every message for expert answers and
+re-serializing the whole history with get_buffer_string) against the
+incremental state the interview now carries (the num_answers counter and the
+transcript lines appended per message). Then runs the interview subgraph end to
+end under a zero-latency FakeChatModel and reports the time per turn, so any
+remaining growth with length shows up.
+
+    python benchmarks/interview_routing.py --turns 10 100 1000 10000
+"""
+import argparse
+import os
+import sys
+import time
+import timeit
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [HERE, os.path.join(HERE, "..", "module-4", "studio")]
+os.environ.update(LLM_CACHE="off", RETRIEVAL_BACKEND="fixture", RETRIEVAL_CACHE_TTL="0")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from langchain_core.messages import AIMessage, HumanMessage, get_buffer_string  # noqa: E402
+
+import research_assistant as ra  # noqa: E402
+from fakes import FakeChatModel, research_respond, research_structured  # noqa: E402
+
+
+def legacy_route(state, name="expert"):
+    """route_messages before the counters: a scan of every message per decision."""
+    messages = state["messages"]
+    num_responses = len([m for m in messages if isinstance(m, AIMessage) and m.name == name])
+    if num_responses >= state.get("max_num_turns", 2):
+        return "save_interview"
+    return "save_interview" if "Thank you so much for your help" in messages[-2].content else "ask_question"
+
+
+def legacy_save(state):
+    return {"interview": get_buffer_string(state["messages"])}
+
+
+def interview_state(turns):
+    """State after `turns` question/answer pairs, with both the messages and the incremental fields."""
+    messages = [HumanMessage("So you said you were writing an article on agents?")]
+    for turn in range(turns):
+        messages.append(AIMessage(f"Question {turn}: what changed?"))
+        messages.append(AIMessage(f"Answer {turn}: it got faster.", name="expert"))
+    transcript = [get_buffer_string(messages[:1])] + [get_buffer_string([m]) for m in messages[1:]]
+    return {"messages": messages, "max_num_turns": turns + 1, "num_answers": turns, "transcript": transcript}
+
+
+def per_call_us(function, state, number):
+    return min(timeit.repeat(lambda: function(state), number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, nargs="+", default=[10, 100, 1000, 10000], help="interview lengths")
+    parser.add_argument("--graph-turns", type=int, nargs="+", default=[10, 50, 200],
+                        help="interview lengths to run end to end through the subgraph")
+    args = parser.parse_args()
+
+    print(f"{'turns':>8}{'route old us':>14}{'route new us':>14}{'save old us':>13}{'save new us':>13}")
+    for turns in args.turns:
+        state = interview_state(turns)
+        number = max(1, 20_000 // (turns + 1))
+        assert legacy_route(state) == ra.route_messages(state)
+        assert legacy_save(state) == ra.save_interview(state)
+        print(f"{turns:>8}{per_call_us(legacy_route, state, number):>14.1f}"
+              f"{per_call_us(ra.route_messages, state, number):>14.1f}"
+              f"{per_call_us(legacy_save, state, number):>13.1f}{per_call_us(ra.save_interview, state, number):>13.1f}")
+
+    # The analyst never says thank you, so interviews run the full max_num_turns
+    ra.llm = FakeChatModel(respond=lambda messages: "What changed?" if "interviewing an expert" in
+                           str(messages[0].content) else research_respond(messages),
+                           structured=research_structured(1), latency=0.0)
+    analyst = ra.Analyst(affiliation="Lab", name="Analyst", role="Researcher", description="Agents")
+    print(f"\n{'turns':>8}{'interview s':>14}{'ms per turn':>14}")
+    for turns in args.graph_turns:
+        started = time.perf_counter()
+        ra.interview_graph.invoke({"analyst": analyst, "messages": [HumanMessage("Hi")], "max_num_turns": turns},
+                                  {"recursion_limit": 6 * turns + 10})
+        elapsed = time.perf_counter() - started
+        print(f"{turns:>8}{elapsed:>14.2f}{elapsed / turns * 1000:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
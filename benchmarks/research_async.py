@@ -0,0 +1,109 @@
+"""Throughput of the sync vs. async research assistant graphs under a mock LLM.
+
+Runs the module-4 research assistant end to end (analysts, interviews, report)
+with `FakeChatModel` and the offline retrieval fixtures, each LLM and search
+call taking a fixed latency. For each concurrency level it drives that many
+research runs at once, the sync graph from a thread pool and the async graph
+with `asyncio.gather` on one event loop, and reports wall time, runs/second and
+the peak number of live threads.
+
+    python benchmarks/research_async.py --concurrency 1 8 32 --latency 0.05
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [HERE, os.path.join(HERE, "..", "module-4", "studio")]
+# Offline and uncached, with interviews limited only by the benchmark's concurrency. Every run has its own topic
+# (and so its own questions and queries), so the query planner and the retrieval coalescer only share work
+# between runs where real traffic would.
+os.environ.update(LLM_CACHE="off", RETRIEVAL_BACKEND="fixture", RETRIEVAL_CACHE_TTL="0",
+                  INTERVIEW_MAX_IN_FLIGHT="100000")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+import research_assistant as ra  # noqa: E402
+from fakes import FakeChatModel, research_respond, research_structured  # noqa: E402
+
+
+class ThreadPeak:
+    """Sample threading.active_count() in the background and keep the maximum."""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = threading.active_count()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, threading.active_count())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        # Not counting the sampler itself
+        self.peak -= 1
+
+
+def run_sync(graph, inputs, concurrency):
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(graph.invoke, [inputs() for _ in range(concurrency)]))
+
+
+async def run_async(graph, inputs, concurrency):
+    return await asyncio.gather(*(graph.ainvoke(inputs()) for _ in range(concurrency)))
+
+
+def measure(label, concurrency, run):
+    with ThreadPeak() as threads:
+        started = time.perf_counter()
+        results = run()
+        elapsed = time.perf_counter() - started
+    assert all(result["final_report"] for result in results)
+    print(f"{label:<8}{concurrency:>12}{elapsed:>10.2f}{concurrency / elapsed:>12.2f}{threads.peak:>14}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32], help="research runs at once")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per LLM or search call")
+    parser.add_argument("--analysts", type=int, default=3, help="analysts (interviews) per run")
+    args = parser.parse_args()
+
+    ra.llm = FakeChatModel(respond=research_respond, structured=research_structured(args.analysts),
+                           latency=args.latency)
+    ra.retrieval.backend.latency = args.latency
+    # human_analyst_feedback="approve" goes straight from the analysts to the interviews
+    sync_graph = ra.builder.compile()
+    async_graph = ra.async_builder.compile()
+    runs = itertools.count()
+
+    def inputs():
+        return {"topic": f"LLM agents {next(runs)}", "max_analysts": args.analysts, "human_analyst_feedback": "approve"}
+
+    print(f"{'graph':<8}{'concurrency':>12}{'wall s':>10}{'runs/s':>12}{'peak threads':>14}")
+    for concurrency in args.concurrency:
+        sync_s = measure("sync", concurrency, lambda: run_sync(sync_graph, inputs, concurrency))
+        async_s = measure("async", concurrency, lambda: asyncio.run(run_async(async_graph, inputs, concurrency)))
+        print(f"{'':<8}{'':>12}{'speedup':>10}{sync_s / async_s:>12.2f}x")
+    print(f"\nLLM calls: {ra.llm.calls}, retrieval: {ra.retrieval.stats()}")
+    print(f"Report writer prompt tokens: {ra.token_ledger.summary()['total']}")
+    print(f"Query plans: {ra.query_planner.stats()}")
+    for name, stats in ra.scheduler_metrics.summary().items():
+        if name.startswith("interview_turn"):
+            print(f"  {name:<36}p50 {stats['p50_ms']:>7.1f} ms  p95 {stats['p95_ms']:>7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
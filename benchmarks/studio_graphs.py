@@ -0,0 +1,416 @@
+"""Offline benchmark of every LangGraph Studio graph under concurrency.
+
+Runs each graph listed in a langgraph.json (module-1 to module-5 studio,
+module-6 deployment) with its chat model swapped for `FakeChatModel` (fixed
+latency per call, optional latency per output token, scripted text, structured
+and tool-call outputs) and its web/Wikipedia search for the fakes in fakes.py.
+Each graph runs `--runs` times with `--concurrency` runs in flight: sync graphs
+from a thread pool, async graphs on one event loop. No network access or API
+keys are needed, and the outputs are deterministic.
+
+For each graph it reports p50/p99 run latency, throughput, LLM calls and
+estimated tokens, the peak traced memory, and a per-node time breakdown
+(inclusive: a node that runs a subgraph includes the subgraph's nodes). Graphs
+are named <directory>/<graph id in langgraph.json>; a graph without a scenario
+here is reported, so new graphs cannot silently drop out of the benchmark.
+
+    python benchmarks/studio_graphs.py
+    python benchmarks/studio_graphs.py --graphs module-4/research_assistant module-4/map_reduce --runs 50
+"""
+import argparse
+import asyncio
+import contextlib
+import importlib
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import HumanMessage, ToolMessage
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, HERE)
+# Offline: no LLM cache on disk, fixture retrieval, placeholder keys for clients built at import
+os.environ.update(LLM_CACHE="off", RETRIEVAL_BACKEND="fixture", RETRIEVAL_CACHE_TTL="0")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("TAVILY_API_KEY", "benchmark")
+
+from fakes import (FakeChatModel, FakeWebSearch, FakeWikipediaLoader, research_respond,  # noqa: E402
+                   research_structured)
+
+# Directories holding a langgraph.json, relative to the repository root
+GRAPH_DIRS = ("module-1/studio", "module-2/studio", "module-3/studio", "module-4/studio", "module-5/studio",
+              "module-6/deployment")
+
+
+def load(directory: str, module: str):
+    """Import <directory>/<module>.py, its sibling modules taking precedence over same-named ones elsewhere.
+
+    module-1 and module-3 both have an agent.py, module-5 and module-6 both a configuration.py.
+    """
+    path = os.path.join(ROOT, directory)
+    for name in os.listdir(path):
+        cached = sys.modules.get(name[:-3]) if name.endswith(".py") else None
+        if cached is not None and os.path.dirname(getattr(cached, "__file__", None) or "") != path:
+            del sys.modules[name[:-3]]
+    if path in sys.path:
+        sys.path.remove(path)
+    sys.path.insert(0, path)
+    return importlib.import_module(module)
+
+
+def studio_graphs():
+    """Every graph declared in a langgraph.json, as <directory>/<graph id>."""
+    names = []
+    for directory in GRAPH_DIRS:
+        with open(os.path.join(ROOT, directory, "langgraph.json")) as f:
+            names.extend(f"{directory.split('/')[0]}/{graph}" for graph in json.load(f)["graphs"])
+    return names
+
+
+@dataclass
+class Prepared:
+    graph: object
+    make_input: Callable[[int], dict]
+    make_config: Callable[[int], dict]
+    model: Optional[FakeChatModel] = None
+    asynchronous: bool = False
+    # Counters of work answered from a cache instead of done, printed with the node breakdown
+    reuse: Optional[Callable[[], dict]] = None
+
+
+def thread_config(run):
+    return {"configurable": {"thread_id": f"run-{run}", "user_id": f"user-{run}"}}
+
+
+def no_config(run):
+    return None
+
+
+def memory_graph(module, **compile_kwargs):
+    """Recompile a module-5/6 graph with a store (and checkpointer), which its nodes require."""
+    from langgraph.checkpoint.memory import MemorySaver
+    from langgraph.store.memory import InMemoryStore
+
+    return module.builder.compile(checkpointer=MemorySaver(), store=InMemoryStore(), **compile_kwargs)
+
+
+def multiply_calls(messages, tools):
+    """Call multiply once per human request, then answer from the tool result."""
+    if isinstance(messages[-1], ToolMessage):
+        return []
+    return [{"name": "multiply", "args": {"a": 3, "b": 4}}]
+
+
+# Scenarios: build a Prepared graph from (FakeChatModel keyword arguments)
+
+def simple_graph(fake):
+    simple = load("module-1/studio", "simple")
+    # Seeded, so the 50/50 mood branch is reproducible
+    simple.random = random.Random(0)
+    return Prepared(simple.graph, lambda run: {"graph_state": f"Hi, this is run {run}."}, no_config)
+
+
+def router(fake):
+    rt = load("module-1/studio", "router")
+    rt.llm = FakeChatModel(respond=lambda messages: "", tool_calls=multiply_calls, **fake)
+    rt.llm_with_tools = rt.llm.bind_tools([rt.multiply])
+    return Prepared(rt.graph, lambda run: {"messages": [HumanMessage(f"Multiply 3 and 4 (run {run})")]},
+                    no_config, rt.llm)
+
+
+def agent(fake, directory):
+    ag = load(directory, "agent")
+    ag.llm = FakeChatModel(respond=lambda messages: f"The result is {messages[-1].content}.",
+                           tool_calls=multiply_calls, **fake)
+    ag.llm_with_tools = ag.llm.bind_tools(ag.tools)
+    return Prepared(ag.graph, lambda run: {"messages": [HumanMessage(f"Multiply 3 and 4 (run {run})")]},
+                    no_config, ag.llm)
+
+
+def chatbot(fake):
+    cb = load("module-2/studio", "chatbot")
+    cb.model = FakeChatModel(respond=lambda messages: f"Reply to: {messages[-1].content[:40]}", **fake)
+    # Seven messages in: one reply, then the summarization branch
+    return Prepared(cb.graph, lambda run: {"messages": [HumanMessage(f"Message {i} of run {run}") for i in range(7)]},
+                    no_config, cb.model)
+
+
+def dynamic_breakpoints(fake):
+    db = load("module-3/studio", "dynamic_breakpoints")
+    # Inputs of at most 5 characters pass step_2's NodeInterrupt check
+    return Prepared(db.graph, lambda run: {"input": f"r{run % 1000}"}, no_config)
+
+
+def parallelization(fake):
+    par = load("module-4/studio", "parallelization")
+    par.TavilySearchResults = FakeWebSearch
+    par.WikipediaLoader = FakeWikipediaLoader
+    par.llm = FakeChatModel(respond=lambda messages: "The answer, from the context.", **fake)
+    return Prepared(par.graph, lambda run: {"question": f"How did the model {run} do?"}, no_config, par.llm)
+
+
+def sub_graphs(fake):
+    sg = load("module-4/studio", "sub_graphs")
+
+    def logs(run):
+        return [{"id": f"{run}-{i}", "question": f"Question {i}?", "docs": None, "answer": f"Answer {i}.",
+                 **({"grade": 0, "grader": "human", "feedback": "Wrong docs"} if i % 3 == 0 else {})}
+                for i in range(10)]
+
+    return Prepared(sg.graph, lambda run: {"raw_logs": logs(run)}, no_config)
+
+
+def map_reduce(fake):
+    mr = load("module-4/studio", "map_reduce")
+
+    def structured(schema, prompt):
+        if schema is mr.Subjects:
+            return schema(subjects=["cats", "dogs", "birds"])
+        if schema is mr.Joke:
+            return schema(joke=f"A joke: {prompt[-40:]}")
+        return schema(id=0)
+
+    mr.model = FakeChatModel(respond=lambda messages: "", structured=structured, **fake)
+    return Prepared(mr.graph, lambda run: {"topic": f"animals {run}"}, no_config, mr.model)
+
+
+def research_assistant(fake, asynchronous=False):
+    ra = load("module-4/studio", "research_assistant")
+    ra.llm = FakeChatModel(respond=research_respond, structured=research_structured(3), **fake)
+    ra.retrieval.backend.latency = FakeWebSearch.latency
+    # A fresh planner and search service per scenario, so the async run does not reuse the sync run's work
+    ra.query_planner = type(ra.query_planner)(ra.query_planner.queries_per_turn, ra.query_planner.max_entries)
+    ra.retrieval = type(ra.retrieval)(ra.retrieval.backend, ra.retrieval.ttl, ra.retrieval.max_entries)
+    # Approving up front skips the human_feedback interrupt
+    graph = (ra.async_builder if asynchronous else ra.builder).compile()
+    # Each run has its own topic, and the fakes ask and search per analyst, so plans and searches are
+    # only reused where a real run would reuse them
+    return Prepared(graph, lambda run: {"topic": f"LLM agents {run}", "max_analysts": 3,
+                                        "human_analyst_feedback": "approve"},
+                    no_config, ra.llm, asynchronous,
+                    lambda: {"plans": ra.query_planner.stats(), "searches": ra.retrieval.stats()})
+
+
+def chatbot_memory(fake):
+    ms = load("module-5/studio", "memory_store")
+    ms.model = FakeChatModel(respond=lambda messages: "Noted: the user likes biking.", **fake)
+    return Prepared(memory_graph(ms), lambda run: {"messages": [HumanMessage("Hi, I'm Lance and I like to bike.")]},
+                    thread_config, ms.model)
+
+
+def chatbot_memory_profile(fake):
+    mp = load("module-5/studio", "memoryschema_profile")
+    from trustcall import create_extractor
+
+    # Trustcall forces the UserProfile tool, which FakeChatModel fills with example arguments
+    mp.model = FakeChatModel(respond=lambda messages: "Nice to meet you, Lance.", **fake)
+    mp.trustcall_extractor = create_extractor(mp.model, tools=[mp.UserProfile], tool_choice="UserProfile")
+    return Prepared(memory_graph(mp), lambda run: {"messages": [HumanMessage("Hi, I'm Lance and I like to bike.")]},
+                    thread_config, mp.model)
+
+
+def chatbot_memory_collection(fake):
+    mc = load("module-5/studio", "memoryschema_collection")
+    from trustcall import create_extractor
+
+    mc.model = FakeChatModel(respond=lambda messages: "Biking in San Francisco sounds great.", **fake)
+    mc.trustcall_extractor = create_extractor(mc.model, tools=[mc.Memory], tool_choice="Memory",
+                                              enable_inserts=True)
+    return Prepared(memory_graph(mc), lambda run: {"messages": [HumanMessage("I like to bike around San Francisco.")]},
+                    thread_config, mc.model)
+
+
+def memory_agent(fake, directory="module-5/studio", module="memory_agent"):
+    ma = load(directory, module)
+    from trustcall import create_extractor
+
+    updates = ("user", "todo", "instructions")
+
+    def tool_calls(messages, tools):
+        if [tool["function"]["name"] for tool in tools] != ["UpdateMemory"]:
+            # Trustcall extractors: the forced tool, with example arguments
+            return None
+        if isinstance(messages[-1], ToolMessage):
+            return []
+        # Rotate through the three kinds of memory update across runs
+        run = int(messages[-1].content.rsplit(" ", 1)[-1])
+        return [{"name": "UpdateMemory", "args": {"update_type": updates[run % len(updates)]}}]
+
+    ma.model = FakeChatModel(respond=lambda messages: "Done, I updated my memory.", tool_calls=tool_calls, **fake)
+    ma.profile_extractor = create_extractor(ma.model, tools=[ma.Profile], tool_choice="Profile")
+    return Prepared(memory_graph(ma), lambda run: {"messages": [HumanMessage(f"I need to book a bike tune-up, run {run}")]},
+                    thread_config, ma.model)
+
+
+def task_maistro(fake):
+    # The deployed memory agent: same nodes, plus a configurable ToDo category and role
+    return memory_agent(fake, "module-6/deployment", "task_maistro")
+
+
+SCENARIOS = {
+    "module-1/simple_graph": simple_graph,
+    "module-1/router": router,
+    "module-1/agent": lambda fake: agent(fake, "module-1/studio"),
+    "module-2/chatbot": chatbot,
+    "module-3/agent": lambda fake: agent(fake, "module-3/studio"),
+    "module-3/dynamic_breakpoints": dynamic_breakpoints,
+    "module-4/parallelization": parallelization,
+    "module-4/sub_graphs": sub_graphs,
+    "module-4/map_reduce": map_reduce,
+    "module-4/research_assistant": research_assistant,
+    "module-4/research_assistant_async": lambda fake: research_assistant(fake, asynchronous=True),
+    "module-5/chatbot_memory": chatbot_memory,
+    "module-5/chatbot_memory_profile": chatbot_memory_profile,
+    "module-5/chatbot_memory_collection": chatbot_memory_collection,
+    "module-5/memory_agent": memory_agent,
+    "module-6/task_maistro": task_maistro,
+}
+
+
+class NodeTimer(BaseCallbackHandler):
+    """Wall time of every graph node run, from the chain callbacks LangGraph emits per node."""
+
+    run_inline = True
+
+    def __init__(self):
+        self.samples = {}
+        self._started = {}
+        self._lock = threading.Lock()
+
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        # Runnables inside a node inherit its metadata; the node itself is the run named after it
+        if node is not None and kwargs.get("name") == node:
+            self._started[run_id] = (node, time.perf_counter())
+
+    def _finish(self, run_id):
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            with self._lock:
+                self.samples.setdefault(started[0], []).append(time.perf_counter() - started[1])
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._finish(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id)
+
+
+def with_callbacks(config, timer):
+    return {**(config or {}), "callbacks": [timer]}
+
+
+def timed_run(invoke, latencies):
+    started = time.perf_counter()
+    invoke()
+    latencies.append(time.perf_counter() - started)
+
+
+def run_sync(prepared, runs, concurrency, timer, latencies):
+    def one(run):
+        timed_run(lambda: prepared.graph.invoke(prepared.make_input(run),
+                                                with_callbacks(prepared.make_config(run), timer)), latencies)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(runs)))
+
+
+async def run_async(prepared, runs, concurrency, timer, latencies):
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(run):
+        async with slots:
+            started = time.perf_counter()
+            await prepared.graph.ainvoke(prepared.make_input(run), with_callbacks(prepared.make_config(run), timer))
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one(run) for run in range(runs)))
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def benchmark(name, args):
+    fake = {"latency": args.latency, "latency_per_token": args.latency_per_token}
+    FakeWebSearch.latency = FakeWikipediaLoader.latency = args.search_latency
+    try:
+        prepared = SCENARIOS[name](fake)
+    except ImportError as e:
+        print(f"{name:<36}skipped: {e}")
+        return None
+
+    timer, latencies = NodeTimer(), []
+    if args.trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    # Several graphs print progress from their nodes
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        if prepared.asynchronous:
+            asyncio.run(run_async(prepared, args.runs, args.concurrency, timer, latencies))
+        else:
+            run_sync(prepared, args.runs, args.concurrency, timer, latencies)
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024 if args.trace_memory else float("nan")
+    if args.trace_memory:
+        tracemalloc.stop()
+
+    stats = prepared.model.stats() if prepared.model is not None else {"calls": 0, "input_tokens": 0,
+                                                                       "output_tokens": 0}
+    print(f"{name:<36}{statistics.median(latencies) * 1000:>9.1f}{percentile(latencies, 0.99) * 1000:>9.1f}"
+          f"{args.runs / elapsed:>9.2f}{stats['calls']:>8}{stats['input_tokens']:>10}{stats['output_tokens']:>9}"
+          f"{peak:>9.1f}")
+    return timer.samples, prepared.reuse() if prepared.reuse is not None else None
+
+
+def print_breakdown(name, samples, reuse=None):
+    total = sum(sum(times) for times in samples.values()) or 1.0
+    print(f"\n{name}\n  {'node':<24}{'calls':>7}{'p50 ms':>9}{'total s':>9}{'share':>7}")
+    for node, times in sorted(samples.items(), key=lambda item: -sum(item[1])):
+        print(f"  {node:<24}{len(times):>7}{statistics.median(times) * 1000:>9.1f}{sum(times):>9.2f}"
+              f"{sum(times) / total:>7.0%}")
+    for cache, stats in (reuse or {}).items():
+        print(f"  {cache} reused: " + ", ".join(f"{key} {value}" for key, value in stats.items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--graphs", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS),
+                        help="graphs to run")
+    parser.add_argument("--runs", type=int, default=20, help="runs per graph")
+    parser.add_argument("--concurrency", type=int, default=4, help="runs in flight at once")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per LLM call")
+    parser.add_argument("--latency-per-token", type=float, default=0.0, help="extra seconds per output token")
+    parser.add_argument("--search-latency", type=float, default=0.05, help="seconds per web/Wikipedia search")
+    parser.add_argument("--no-trace-memory", dest="trace_memory", action="store_false",
+                        help="skip tracemalloc (it slows every run down)")
+    args = parser.parse_args()
+
+    print(f"{args.runs} runs per graph, {args.concurrency} in flight\n")
+    print(f"{'graph':<36}{'p50 ms':>9}{'p99 ms':>9}{'runs/s':>9}{'calls':>8}{'tok in':>10}{'tok out':>9}"
+          f"{'peak MB':>9}")
+    breakdowns = {}
+    for name in studio_graphs():
+        if name not in SCENARIOS:
+            print(f"{name:<36}no scenario in {os.path.basename(__file__)}")
+    for name in args.graphs:
+        result = benchmark(name, args)
+        if result is not None:
+            breakdowns[name] = result
+    for name, (samples, reuse) in breakdowns.items():
+        print_breakdown(name, samples, reuse)
+
+
+if __name__ == "__main__":
+    main()
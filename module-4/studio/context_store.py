@@ -0,0 +1,214 @@
+import functools
+import math
+import os
+import re
+import threading
+from collections import Counter
+from typing import Optional
+
+from sources import source_id
+
+# Paragraphs are packed into chunks of about this many tokens before ranking
+CHUNK_TOKENS = 200
+# A truncated chunk shorter than this is dropped rather than sent as a stub
+MIN_CHUNK_TOKENS = 40
+# Chunks retrieved for the current question are ranked ahead of older ones by this factor
+NEW_CHUNK_BOOST = 2.0
+# Tokens of each section kept in the digest the introduction and conclusion writers read
+DIGEST_TOKENS_PER_SECTION = 120
+
+_WORD = re.compile(r"\w+")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+@functools.lru_cache(maxsize=1)
+def _encoding():
+    """ tiktoken's encoding for the gpt-4o family, or None when tiktoken or its BPE file is unavailable """
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """ Token count with tiktoken, else the usual ~4 characters per token estimate """
+    encoding = _encoding()
+    if encoding is None:
+        return math.ceil(len(text) / 4)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """ Cut text down to at most max_tokens tokens """
+    encoding = _encoding()
+    if encoding is None:
+        return text[:max_tokens * 4]
+    tokens = encoding.encode(text, disallowed_special=())
+    return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
+
+
+def web_docs(search_docs: list, turn: int) -> list:
+    """ Tavily results ({"url", "content"}) as context documents retrieved on `turn` """
+    return [{"id": source_id(doc["url"]), "kind": "web", "source": doc["url"], "page": "", "content": doc["content"],
+             "turn": turn}
+            for doc in search_docs]
+
+
+def wikipedia_docs(search_docs: list, turn: int) -> list:
+    """ Wikipedia Documents as context documents retrieved on `turn` """
+    docs = []
+    for doc in search_docs:
+        source, page = doc.metadata["source"], str(doc.metadata.get("page", ""))
+        docs.append({"id": source_id(source, page), "kind": "wikipedia", "source": source, "page": page,
+                     "content": doc.page_content, "turn": turn})
+    return docs
+
+
+def merge_context(existing: list, new: list) -> list:
+    """ Reducer for InterviewState.context: one entry per (source, page), keeping the longest content
+
+    Parallel searches and later turns often return the same page again; it keeps its first position
+    and the turn it was first retrieved on.
+    """
+    merged = {(doc["source"], doc["page"]): doc for doc in existing or []}
+    for doc in new or []:
+        key = (doc["source"], doc["page"])
+        seen = merged.get(key)
+        if seen is None:
+            merged[key] = doc
+        elif len(doc["content"]) > len(seen["content"]):
+            merged[key] = {**doc, "turn": seen["turn"]}
+    return list(merged.values())
+
+
+def _chunks(content: str) -> list:
+    """ Pack paragraphs into chunks of about CHUNK_TOKENS tokens """
+    chunks, current, size = [], [], 0
+    for paragraph in filter(None, (p.strip() for p in re.split(r"\n\s*\n", content))):
+        tokens = count_tokens(paragraph)
+        if current and size + tokens > CHUNK_TOKENS:
+            chunks.append("\n\n".join(current))
+            current, size = [], 0
+        current.append(paragraph)
+        size += tokens
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def _header(doc: dict) -> str:
+    if doc["kind"] == "web":
+        return f'<Document id="{doc["id"]}" href="{doc["source"]}"/>'
+    return f'<Document id="{doc["id"]}" source="{doc["source"]}" page="{doc["page"]}"/>'
+
+
+def select_context(docs: list, query: str, budget: int, current_turn: Optional[int] = None) -> str:
+    """ Render the chunks most relevant to `query` as <Document> blocks, within `budget` tokens
+
+    Chunks are scored by the idf-weighted overlap of their words with the query; those retrieved on
+    `current_turn` (the searches for the question being answered) are boosted, so each answer sees
+    what was just found plus whatever earlier material still bears on the question. Selected chunks
+    are put back in document order, each document once.
+    """
+    chunks = [(d, i, text) for d, doc in enumerate(docs) for i, text in enumerate(_chunks(doc["content"]))]
+    if not chunks:
+        return ""
+    words = [set(_WORD.findall(text.casefold())) for _, _, text in chunks]
+    frequency = Counter(word for chunk_words in words for word in chunk_words)
+    query_words = set(_WORD.findall(query.casefold()))
+
+    def score(n):
+        d, i, _ = chunks[n]
+        relevance = sum(math.log(1 + len(chunks) / frequency[w]) for w in query_words & words[n])
+        if current_turn is not None and docs[d]["turn"] == current_turn:
+            relevance = (relevance + 1) * NEW_CHUNK_BOOST
+        # Earlier chunks of a document win ties: they usually carry its summary
+        return relevance, -i
+
+    selected, remaining = {}, budget
+    for n in sorted(range(len(chunks)), key=score, reverse=True):
+        d, i, text = chunks[n]
+        # Each newly included document also costs its header
+        cost = count_tokens(text) + (0 if d in selected else count_tokens(_header(docs[d])) + 4)
+        if cost > remaining:
+            fit = remaining - (cost - count_tokens(text))
+            if fit < MIN_CHUNK_TOKENS:
+                continue
+            text = truncate_tokens(text, fit)
+            cost = remaining
+        selected.setdefault(d, []).append((i, text))
+        remaining -= cost
+
+    return "\n\n---\n\n".join(
+        f"{_header(docs[d])}\n" + "\n\n".join(text for _, text in sorted(selected[d])) + "\n</Document>"
+        for d in sorted(selected)
+    )
+
+
+def context_budgets_from_env() -> dict:
+    """ Token budgets for rendered context:
+
+    CONTEXT_TOKENS_ANSWER: per expert answer, default 3000
+    CONTEXT_TOKENS_SECTION: for the section written from the whole interview, default 6000
+    """
+    return {
+        "answer": int(os.environ.get("CONTEXT_TOKENS_ANSWER", "3000")),
+        "section": int(os.environ.get("CONTEXT_TOKENS_SECTION", "6000")),
+    }
+
+
+@functools.lru_cache(maxsize=64)
+def section_digest(sections: tuple, tokens_per_section: int = DIGEST_TOKENS_PER_SECTION) -> str:
+    """ One line per section: its title and leading sentences, up to `tokens_per_section` tokens
+
+    For writers that only need the gist of each memo (the introduction and conclusion). Citations in the
+    kept sentences stay; repeated sections are dropped. Memoized on the sections, so resuming or re-running
+    the writers reuses the same digest (and the same prompt prefix).
+    """
+    abstracts = []
+    for section in sections:
+        lines = [line.strip() for line in section.splitlines() if line.strip()]
+        if not lines:
+            continue
+        titles = [line.lstrip("#").strip() for line in lines if line.startswith("## ")]
+        title = titles[0] if titles else lines[0].lstrip("#").strip()
+        sentences = _SENTENCE_END.split(" ".join(line for line in lines if not line.startswith("#")))
+        lead, used = [], count_tokens(title)
+        for sentence in sentences:
+            cost = count_tokens(sentence)
+            if lead and used + cost > tokens_per_section:
+                break
+            lead.append(sentence)
+            used += cost
+        abstract = f"- {title}: {truncate_tokens(' '.join(lead), max(tokens_per_section - count_tokens(title), 0))}"
+        if abstract not in abstracts:
+            abstracts.append(abstract)
+    return "\n".join(abstracts)
+
+
+class TokenLedger:
+    """ Prompt tokens per LLM call, next to what the same call cost before the shared digest
+
+    `shared_prefix` is the part of the prompt repeated from a call that completed before this one (so eligible for
+    provider prompt caching); `cached` is what the provider reported as read from its cache, when it reports it.
+    """
+
+    def __init__(self):
+        self._totals = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, prompt: int, baseline: int, shared_prefix: int = 0, cached: int = 0) -> None:
+        with self._lock:
+            totals = self._totals.setdefault(name, Counter())
+            totals.update(calls=1, prompt=prompt, baseline=baseline, shared_prefix=shared_prefix, cached=cached)
+
+    def summary(self) -> dict:
+        """ {name: {calls, prompt, baseline, shared_prefix, cached}} plus "total" with "saved" = baseline - prompt """
+        with self._lock:
+            summary = {name: dict(totals) for name, totals in self._totals.items()}
+        total = Counter()
+        for totals in summary.values():
+            total.update(totals)
+        summary["total"] = {**total, "saved": total["baseline"] - total["prompt"]}
+        return summary
@@ -0,0 +1,206 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+
+# Message fields that differ between otherwise identical calls (ids, token usage, fingerprints)
+VOLATILE_FIELDS = {"id", "tool_call_id", "response_metadata", "usage_metadata"}
+TOOL_CALL_FIELDS = ("tool_calls", "invalid_tool_calls", "tool_call_chunks")
+
+
+def _strip_tool_calls(calls):
+    return [{k: v for k, v in call.items() if k != "id"} if isinstance(call, dict) else call for call in calls]
+
+
+def _strip_volatile(node):
+    """ Drop volatile fields from serialized messages and their tool calls, and nothing else (tool args keep their ids) """
+    if isinstance(node, list):
+        return [_strip_volatile(v) for v in node]
+    if not (isinstance(node, dict) and node.get("type") == "constructor" and isinstance(node.get("kwargs"), dict)):
+        return node
+    kwargs = {k: v for k, v in node["kwargs"].items() if k not in VOLATILE_FIELDS}
+    for field in TOOL_CALL_FIELDS:
+        if isinstance(kwargs.get(field), list):
+            kwargs[field] = _strip_tool_calls(kwargs[field])
+    additional = kwargs.get("additional_kwargs")
+    if isinstance(additional, dict) and isinstance(additional.get("tool_calls"), list):
+        kwargs["additional_kwargs"] = {**additional, "tool_calls": _strip_tool_calls(additional["tool_calls"])}
+    return {**node, "kwargs": kwargs}
+
+
+def normalize_prompt(prompt: str) -> str:
+    """ Canonical form of a serialized prompt: volatile fields dropped, keys sorted """
+    try:
+        return json.dumps(_strip_volatile(json.loads(prompt)), sort_keys=True, separators=(",", ":"))
+    except ValueError:
+        # Plain string prompts (completion models) are used as-is
+        return prompt
+
+
+def cache_key(prompt: str, llm_string: str) -> str:
+    """ Key a call on the model and its parameters (which include any structured-output schema) and the prompt """
+    digest = hashlib.sha256()
+    digest.update(llm_string.encode())
+    digest.update(b"\0")
+    digest.update(normalize_prompt(prompt).encode())
+    return digest.hexdigest()
+
+
+def _serializable(generation):
+    """ The generation with any structured-output object in additional_kwargs["parsed"] as a plain dict
+
+    ChatOpenAI's json_schema structured output keeps the pydantic object there, which dumps() can only
+    store as "not_implemented" (and loads() then refuses); its parser accepts the dict form as well.
+    """
+    message = getattr(generation, "message", None)
+    parsed = message.additional_kwargs.get("parsed") if message is not None else None
+    if not hasattr(parsed, "model_dump"):
+        return generation
+    message = message.model_copy(update={"additional_kwargs": {**message.additional_kwargs,
+                                                               "parsed": parsed.model_dump()}})
+    return generation.model_copy(update={"message": message})
+
+
+class InMemoryBackend:
+    """ LRU dict of serialized responses, with an optional TTL """
+
+    def __init__(self, max_entries: int = 10_000, ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (value, stored_at)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self.ttl is not None and time.time() - entry[1] > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteBackend:
+    """ Persistent responses in a SQLite file, evicted by TTL and least-recent use """
+
+    def __init__(self, path: str, max_entries: int = 10_000, ttl: Optional[float] = None):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL, used_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_used_at ON llm_cache (used_at)")
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT value, stored_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if self.ttl is not None and now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE llm_cache SET used_at = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?)", (key, value, now, now))
+            if self.ttl is not None:
+                self._conn.execute("DELETE FROM llm_cache WHERE stored_at < ?", (now - self.ttl,))
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                "SELECT key FROM llm_cache ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM llm_cache")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+
+class LLMResponseCache(BaseCache):
+    """ LangChain cache that keys responses on model + normalized messages and tracks its hit rate """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        value = self.backend.get(cache_key(prompt, llm_string))
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return loads(value, allowed_objects="core")
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        self.backend.set(cache_key(prompt, llm_string), dumps([_serializable(g) for g in return_val]))
+
+    def clear(self, **kwargs: Any) -> None:
+        self.backend.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hit_rate, "entries": len(self.backend)}
+
+
+def llm_cache_from_env() -> Optional[LLMResponseCache]:
+    """ Build the cache from the environment:
+
+    LLM_CACHE: sqlite (default), memory or off
+    LLM_CACHE_PATH: SQLite file, default .llm_cache.sqlite next to this module
+    LLM_CACHE_TTL: seconds an entry stays valid, default no expiry
+    LLM_CACHE_MAX_ENTRIES: entries kept before least recently used ones are evicted, default 10000
+    """
+    kind = os.environ.get("LLM_CACHE", "sqlite").lower()
+    if kind in ("off", "none", "0", "false"):
+        return None
+    ttl = os.environ.get("LLM_CACHE_TTL")
+    ttl = float(ttl) if ttl else None
+    max_entries = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", "10000"))
+    if kind == "memory":
+        return LLMResponseCache(InMemoryBackend(max_entries=max_entries, ttl=ttl))
+    path = os.environ.get("LLM_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".llm_cache.sqlite"))
+    return LLMResponseCache(SQLiteBackend(path, max_entries=max_entries, ttl=ttl))
@@ -0,0 +1,69 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+
+def history_key(messages: list) -> str:
+    """ Hash of a conversation's content: message type, name and text, ignoring ids and metadata """
+    digest = hashlib.sha256()
+    for message in messages:
+        digest.update(json.dumps([message.type, message.name, message.content], sort_keys=True).encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class QueryPlanner:
+    """ Search queries planned once per conversation state and reused by every retriever
+
+    Plans are memoized on history_key(messages), so replaying or resuming an interview, or a retry of
+    the same turn, does not ask the LLM again.
+    """
+
+    def __init__(self, queries_per_turn: int = 1, max_entries: int = 1024):
+        self.queries_per_turn = queries_per_turn
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._plans = OrderedDict()  # history key -> [query]
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            queries = self._plans.get(key)
+            if queries is None:
+                self.misses += 1
+                return None
+            self._plans.move_to_end(key)
+            self.hits += 1
+            return queries
+
+    def _put(self, key, queries):
+        queries = queries[:self.queries_per_turn]
+        with self._lock:
+            self._plans[key] = queries
+            self._plans.move_to_end(key)
+            while len(self._plans) > self.max_entries:
+                self._plans.popitem(last=False)
+        return queries
+
+    def plan(self, messages: list, generate) -> list:
+        """ The memoized queries for `messages`, else generate(messages) -> [query] """
+        key = history_key(messages)
+        queries = self._get(key)
+        return queries if queries is not None else self._put(key, generate(messages))
+
+    async def aplan(self, messages: list, agenerate) -> list:
+        """ plan() with a coroutine generator """
+        key = history_key(messages)
+        queries = self._get(key)
+        return queries if queries is not None else self._put(key, await agenerate(messages))
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._plans)}
+
+
+def query_planner_from_env() -> QueryPlanner:
+    """ SEARCH_QUERIES_PER_TURN: queries planned per question and sent to every retriever, default 1 """
+    return QueryPlanner(int(os.environ.get("SEARCH_QUERIES_PER_TURN", "1")))
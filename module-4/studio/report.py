@@ -0,0 +1,106 @@
+import re
+from typing import Optional
+
+from langchain_core.messages import AIMessageChunk
+
+from sources import renumber
+
+# Writer nodes whose tokens make up the report, by the part of the report they write
+REPORT_PARTS = {"write_introduction": "introduction", "write_report": "content", "write_conclusion": "conclusion"}
+
+_INSIGHTS_HEADING = re.compile(r"\A\s*#+\s*Insights\s*\n")
+_SOURCES_HEADING = re.compile(r"^#+\s*Sources\s*$", re.MULTILINE)
+
+
+def parse_report_body(content: str) -> tuple:
+    """ Split the report writer's output into (body, [source lines])
+
+    The leading "## Insights" title is dropped (finalize_report adds its own framing) and everything
+    under the last "## Sources" heading becomes one entry per non-empty line. Without a Sources heading
+    the sources list is empty.
+    """
+    content = _INSIGHTS_HEADING.sub("", content, count=1)
+    headings = list(_SOURCES_HEADING.finditer(content))
+    if not headings:
+        return content.strip(), []
+    heading = headings[-1]
+    sources = [line.strip() for line in content[heading.end():].splitlines() if line.strip()]
+    return content[:heading.start()].strip(), sources
+
+
+def assemble_report(introduction: str, body: str, conclusion: str, sources: Optional[list] = None) -> str:
+    """ Introduction, body and conclusion separated by rules, then the Sources list """
+    report = introduction + "\n\n---\n\n" + body + "\n\n---\n\n" + conclusion
+    if sources:
+        report += "\n\n## Sources\n" + "\n".join(sources)
+    return report
+
+
+class ReportDraft:
+    """ The report as it is being written, fed from graph stream events
+
+    Completed interview sections are kept as they arrive and stand in for the body until the report
+    writer starts; writer tokens are appended to their part of the report as they stream. Citations are
+    renumbered against the source registry on every render, like finalize_report does.
+    """
+
+    def __init__(self):
+        self.sections = []
+        self.sources = {}
+        self.parts = {"introduction": "", "content": "", "conclusion": ""}
+
+    def add_sections(self, sections: list, sources: Optional[dict] = None) -> None:
+        self.sections.extend(sections)
+        self.sources.update(sources or {})
+
+    def append(self, part: str, text: str) -> None:
+        self.parts[part] += text
+
+    def replace(self, part: str, text: str) -> None:
+        self.parts[part] = text
+
+    def feed(self, mode: str, event) -> bool:
+        """ Apply one (mode, event) pair from stream_mode=["updates", "messages"]; True if the draft changed """
+        if mode == "updates":
+            changed = False
+            for update in event.values():
+                if isinstance(update, dict) and update.get("sections"):
+                    self.add_sections(update["sections"], update.get("sources"))
+                    changed = True
+            return changed
+        if mode == "messages":
+            message, metadata = event
+            part = REPORT_PARTS.get(metadata.get("langgraph_node"))
+            if part is None or not isinstance(message.content, str):
+                return False
+            if isinstance(message, AIMessageChunk):
+                self.append(part, message.content)
+            else:
+                # Whole messages arrive when the model did not stream (e.g. a cache hit)
+                self.replace(part, message.content)
+            return True
+        return False
+
+    def render(self) -> str:
+        body, _ = parse_report_body(self.parts["content"])
+        if not body:
+            body = "\n\n".join(self.sections)
+        (introduction, body, conclusion), sources = renumber(
+            [self.parts["introduction"], body, self.parts["conclusion"]], self.sources)
+        return assemble_report(introduction, body, conclusion, sources)
+
+
+def stream_report(graph, inputs, config=None):
+    """ Run the research graph, yielding the rendered ReportDraft every time it changes """
+    draft = ReportDraft()
+    for mode, event in graph.stream(inputs, config, stream_mode=["updates", "messages"]):
+        if draft.feed(mode, event):
+            yield draft.render()
+
+
+async def astream_report(graph, inputs, config=None):
+    """ stream_report() for async graphs """
+    draft = ReportDraft()
+    async for mode, event in graph.astream(inputs, config, stream_mode=["updates", "messages"]):
+        if draft.feed(mode, event):
+            yield draft.render()
@@ -1,19 +1,50 @@
+import asyncio
 import operator
+import time
 from pydantic import BaseModel, Field
 from typing import Annotated, List
 from typing_extensions import TypedDict
 
-from langchain_community.document_loaders import WikipediaLoader
-from langchain_community.tools.tavily_search import TavilySearchResults
-from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, get_buffer_string
+from langchain_core.messages import HumanMessage, SystemMessage, get_buffer_string
+from langchain_core.runnables import RunnableConfig
 from langchain_openai import ChatOpenAI
 
 from langgraph.constants import Send
 from langgraph.graph import END, MessagesState, START, StateGraph
 
+from context_store import (TokenLedger, context_budgets_from_env, count_tokens, merge_context, section_digest,
+                           select_context, web_docs, wikipedia_docs)
+from llm_cache import llm_cache_from_env
+from query_planner import query_planner_from_env
+from report import assemble_report, parse_report_body
+from retrieval import retrieval_service_from_env
+from scheduler import SchedulerMetrics, interview_scheduler_from_env, rate_limiters_from_env, timed_node
+from sources import merge_sources, register, renumber
+
+### Scheduling
+
+# Token buckets per provider (RATE_LIMIT_OPENAI / _TAVILY / _WIKIPEDIA) and a cap on concurrent
+# interviews (INTERVIEW_MAX_IN_FLIGHT); queue wait vs. execution times land in scheduler_metrics
+scheduler_metrics = SchedulerMetrics()
+rate_limiters = rate_limiters_from_env(scheduler_metrics)
+interview_scheduler = interview_scheduler_from_env(scheduler_metrics)
+async_interview_scheduler = interview_scheduler_from_env(scheduler_metrics, asynchronous=True)
+
 ### LLM
 
-llm = ChatOpenAI(model="gpt-4o", temperature=0) 
+# Every node calls this model at temperature 0, so identical prompts are answered from the cache
+# (configured with LLM_CACHE / LLM_CACHE_PATH / LLM_CACHE_TTL / LLM_CACHE_MAX_ENTRIES, see llm_cache.py)
+llm_cache = llm_cache_from_env()
+llm = ChatOpenAI(model="gpt-4o", temperature=0, cache=llm_cache, rate_limiter=rate_limiters["openai"]) 
+
+### Retrieval
+
+# Shared by all interviews: results are cached by normalized query and concurrent duplicates coalesced
+# (RETRIEVAL_BACKEND=fixture runs offline, see retrieval.py)
+retrieval = retrieval_service_from_env(rate_limiters)
+context_budgets = context_budgets_from_env()
+token_ledger = TokenLedger()
+query_planner = query_planner_from_env()
 
 ### Schema 
 
@@ -47,20 +78,31 @@ class GenerateAnalystsState(TypedDict):
 
 class InterviewState(MessagesState):
     max_num_turns: int # Number turns of conversation
-    context: Annotated[list, operator.add] # Source docs
+    context: Annotated[list, merge_context] # Source docs, one per source/page
     analyst: Analyst # Analyst asking questions
     interview: str # Interview transcript
     sections: list # Final key we duplicate in outer state for Send() API
+    priority: int # Scheduling priority of the interview, lower runs first
+    search_queries: list # Queries planned for the current question, shared by every retriever
+    turn_started: float # When the current question was asked
+    sources: Annotated[dict, merge_sources] # Source registry: stable id -> source, for the documents retrieved
+    num_answers: Annotated[int, operator.add] # Expert answers so far, i.e. the current turn
+    transcript: Annotated[list, operator.add] # One get_buffer_string() line block per message, appended as it is sent
 
 class SearchQuery(BaseModel):
     search_query: str = Field(None, description="Search query for retrieval.")
 
+class SearchQueries(BaseModel):
+    search_queries: List[str] = Field(None, description="Diverse search queries for retrieval, most useful first.")
+
 class ResearchGraphState(TypedDict):
     topic: str # Research topic
     max_analysts: int # Number of analysts
     human_analyst_feedback: str # Human feedback
     analysts: List[Analyst] # Analyst asking questions
     sections: Annotated[list, operator.add] # Send() API key
+    sources: Annotated[dict, merge_sources] # Source registry of every interview, cited by id in the sections
+    digest: str # Title and lead of each section, for the introduction and conclusion writers
     introduction: str # Introduction for the final report
     content: str # Content for the final report
     conclusion: str # Conclusion for the final report
@@ -83,28 +125,42 @@ analyst_instructions="""You are tasked with creating a set of AI analyst persona
 
 5. Assign one analyst to each theme."""
 
-def create_analysts(state: GenerateAnalystsState):
-    
-    """ Create analysts """
-    
+def analyst_messages(state: GenerateAnalystsState):
+
+    """ Prompt for creating analysts """
+
     topic=state['topic']
     max_analysts=state['max_analysts']
     human_analyst_feedback=state.get('human_analyst_feedback', '')
-        
-    # Enforce structured output
-    structured_llm = llm.with_structured_output(Perspectives)
 
     # System message
     system_message = analyst_instructions.format(topic=topic,
                                                             human_analyst_feedback=human_analyst_feedback, 
                                                             max_analysts=max_analysts)
 
+    return [SystemMessage(content=system_message)]+[HumanMessage(content="Generate the set of analysts.")]
+
+def create_analysts(state: GenerateAnalystsState):
+    
+    """ Create analysts """
+    
+    # Enforce structured output
+    structured_llm = llm.with_structured_output(Perspectives)
+
     # Generate question 
-    analysts = structured_llm.invoke([SystemMessage(content=system_message)]+[HumanMessage(content="Generate the set of analysts.")])
+    analysts = structured_llm.invoke(analyst_messages(state))
     
     # Write the list of analysis to state
     return {"analysts": analysts.analysts}
 
+async def acreate_analysts(state: GenerateAnalystsState):
+
+    """ Create analysts (async) """
+
+    structured_llm = llm.with_structured_output(Perspectives)
+    analysts = await structured_llm.ainvoke(analyst_messages(state))
+    return {"analysts": analysts.analysts}
+
 def human_feedback(state: GenerateAnalystsState):
     """ No-op node that should be interrupted on """
     pass
@@ -128,20 +184,40 @@ When you are satisfied with your understanding, complete the interview with: "Th
 
 Remember to stay in character throughout your response, reflecting the persona and goals provided to you."""
 
-def generate_question(state: InterviewState):
+def question_messages(state: InterviewState):
 
-    """ Node to generate a question """
+    """ Prompt for the analyst's next question """
 
     # Get state
     analyst = state["analyst"]
     messages = state["messages"]
 
-    # Generate question 
     system_message = question_instructions.format(goals=analyst.persona)
-    question = llm.invoke([SystemMessage(content=system_message)]+messages)
+    return [SystemMessage(content=system_message)]+messages
+
+def transcript_lines(state: InterviewState, message):
+
+    """ Transcript lines for a new message; the first also records the messages the interview opened with """
+
+    opening = state["messages"] if not state.get("transcript") else []
+    return [get_buffer_string(opening + [message])]
+
+def generate_question(state: InterviewState):
+
+    """ Node to generate a question """
+
+    # Generate question 
+    question = llm.invoke(question_messages(state))
         
     # Write messages to state
-    return {"messages": [question]}
+    return {"messages": [question], "transcript": transcript_lines(state, question), "turn_started": time.time()}
+
+async def agenerate_question(state: InterviewState):
+
+    """ Node to generate a question (async) """
+
+    question = await llm.ainvoke(question_messages(state))
+    return {"messages": [question], "transcript": transcript_lines(state, question), "turn_started": time.time()}
 
 # Search query writing
 search_instructions = SystemMessage(content=f"""You will be given a conversation between an analyst and an expert. 
@@ -154,51 +230,85 @@ Pay particular attention to the final question posed by the analyst.
 
 Convert this final question into a well-structured web search query""")
 
+# Several queries per turn ask for a list instead; one query keeps the original single-query call
+multi_search_instructions = SystemMessage(content=search_instructions.content + f"""
+
+Then write up to {query_planner.queries_per_turn} diverse queries that each cover a different aspect of that question, most useful first.""")
+
+def query_request(messages):
+
+    """ Structured output schema and prompt for planning this turn's queries """
+
+    if query_planner.queries_per_turn == 1:
+        return SearchQuery, [search_instructions]+messages
+    return SearchQueries, [multi_search_instructions]+messages
+
+def planned_queries(messages, plan):
+
+    """ Queries from a SearchQuery / SearchQueries plan, falling back to the question itself """
+
+    queries = [plan.search_query] if isinstance(plan, SearchQuery) else plan.search_queries
+    return [query for query in queries or [] if query] or [messages[-1].content]
+
+def plan_queries(state: InterviewState):
+
+    """ Node to plan the search queries once per turn, for every retriever """
+
+    def generate(messages):
+        schema, prompt = query_request(messages)
+        return planned_queries(messages, llm.with_structured_output(schema).invoke(prompt))
+
+    return {"search_queries": query_planner.plan(state['messages'], generate)}
+
+async def aplan_queries(state: InterviewState):
+
+    """ Node to plan the search queries once per turn, for every retriever (async) """
+
+    async def agenerate(messages):
+        schema, prompt = query_request(messages)
+        return planned_queries(messages, await llm.with_structured_output(schema).ainvoke(prompt))
+
+    return {"search_queries": await query_planner.aplan(state['messages'], agenerate)}
+
 def search_web(state: InterviewState):
     
     """ Retrieve docs from web search """
 
     # Search
-    tavily_search = TavilySearchResults(max_results=3)
+    search_docs = [doc for query in state['search_queries'] for doc in retrieval.search_web(query)]
 
-    # Search query
-    structured_llm = llm.with_structured_output(SearchQuery)
-    search_query = structured_llm.invoke([search_instructions]+state['messages'])
-    
-    # Search
-    search_docs = tavily_search.invoke(search_query.search_query)
-
-     # Format
-    formatted_search_docs = "\n\n---\n\n".join(
-        [
-            f'<Document href="{doc["url"]}"/>\n{doc["content"]}\n</Document>'
-            for doc in search_docs
-        ]
-    )
+    # Tag with the turn so the answer to this question sees these docs first
+    docs = web_docs(search_docs, state.get('num_answers', 0))
+    return {"context": docs, "sources": register(docs)}
+
+async def asearch_web(state: InterviewState):
 
-    return {"context": [formatted_search_docs]} 
+    """ Retrieve docs from web search (async) """
+
+    results = await asyncio.gather(*(retrieval.asearch_web(query) for query in state['search_queries']))
+    search_docs = [doc for docs in results for doc in docs]
+    docs = web_docs(search_docs, state.get('num_answers', 0))
+    return {"context": docs, "sources": register(docs)}
 
 def search_wikipedia(state: InterviewState):
     
     """ Retrieve docs from wikipedia """
 
-    # Search query
-    structured_llm = llm.with_structured_output(SearchQuery)
-    search_query = structured_llm.invoke([search_instructions]+state['messages'])
-    
     # Search
-    search_docs = WikipediaLoader(query=search_query.search_query, 
-                                  load_max_docs=2).load()
-
-     # Format
-    formatted_search_docs = "\n\n---\n\n".join(
-        [
-            f'<Document source="{doc.metadata["source"]}" page="{doc.metadata.get("page", "")}"/>\n{doc.page_content}\n</Document>'
-            for doc in search_docs
-        ]
-    )
+    search_docs = [doc for query in state['search_queries'] for doc in retrieval.search_wikipedia(query)]
+
+    # Tag with the turn so the answer to this question sees these docs first
+    docs = wikipedia_docs(search_docs, state.get('num_answers', 0))
+    return {"context": docs, "sources": register(docs)}
+
+async def asearch_wikipedia(state: InterviewState):
+
+    """ Retrieve docs from wikipedia (async) """
 
-    return {"context": [formatted_search_docs]} 
+    results = await asyncio.gather(*(retrieval.asearch_wikipedia(query) for query in state['search_queries']))
+    search_docs = [doc for docs in results for doc in docs]
+    docs = wikipedia_docs(search_docs, state.get('num_answers', 0))
+    return {"context": docs, "sources": register(docs)}
 
 # Generate expert answer
 answer_instructions = """You are an expert being interviewed by an analyst.
@@ -217,52 +327,67 @@ When answering questions, follow these guidelines:
         
 2. Do not introduce external information or make assumptions beyond what is explicitly stated in the context.
 
-3. The context contain sources at the topic of each individual document.
+3. The context contain sources at the topic of each individual document, each with an id.
 
-4. Include these sources your answer next to any relevant statements. For example, for source # 1 use [1]. 
+4. Cite these sources in your answer next to any relevant statements, using the document id in brackets. For example, for <Document id="S1a2b3c" .../> use [S1a2b3c]. 
 
-5. List your sources in order at the bottom of your answer. [1] Source 1, [2] Source 2, etc
-        
-6. If the source is: <Document source="assistant/docs/llama3_1.pdf" page="7"/>' then just list: 
-        
-[1] assistant/docs/llama3_1.pdf, page 7 
-        
-And skip the addition of the brackets as well as the Document source preamble in your citation."""
+5. Do not list your sources at the bottom of your answer; the ids are resolved for you."""
 
-def generate_answer(state: InterviewState):
-    
-    """ Node to answer a question """
+def answer_messages(state: InterviewState):
+
+    """ Prompt for the expert's answer """
 
     # Get state
     analyst = state["analyst"]
     messages = state["messages"]
-    context = state["context"]
 
-    # Answer question
+    # Only the chunks relevant to the current question, within the token budget
+    context = select_context(state["context"], messages[-1].content, context_budgets["answer"],
+                             current_turn=state.get("num_answers", 0))
     system_message = answer_instructions.format(goals=analyst.persona, context=context)
-    answer = llm.invoke([SystemMessage(content=system_message)]+messages)
+    return [SystemMessage(content=system_message)]+messages
+
+def record_turn(state: InterviewState):
+
+    """ Record the latency of the whole question -> queries -> search -> answer turn """
+
+    if state.get("turn_started"):
+        scheduler_metrics.record("interview_turn", time.time() - state["turn_started"])
+
+def generate_answer(state: InterviewState):
+    
+    """ Node to answer a question """
+
+    # Answer question
+    answer = llm.invoke(answer_messages(state))
             
     # Name the message as coming from the expert
     answer.name = "expert"
+    record_turn(state)
     
-    # Append it to state
-    return {"messages": [answer]}
+    # Append it to state, counting the turn
+    return {"messages": [answer], "transcript": transcript_lines(state, answer), "num_answers": 1}
+
+async def agenerate_answer(state: InterviewState):
+
+    """ Node to answer a question (async) """
+
+    answer = await llm.ainvoke(answer_messages(state))
+    answer.name = "expert"
+    record_turn(state)
+    return {"messages": [answer], "transcript": transcript_lines(state, answer), "num_answers": 1}
 
 def save_interview(state: InterviewState):
     
     """ Save interviews """
 
-    # Get messages
-    messages = state["messages"]
-    
-    # Convert interview to a string
-    interview = get_buffer_string(messages)
+    # The transcript was built one message at a time (same text as get_buffer_string(messages))
+    interview = "\n".join(state["transcript"])
     
     # Save to interviews key
     return {"interview": interview}
 
-def route_messages(state: InterviewState, 
-                   name: str = "expert"):
+def route_messages(state: InterviewState):
 
     """ Route between question and answer """
     
@@ -270,10 +395,8 @@ def route_messages(state: InterviewState,
     messages = state["messages"]
     max_num_turns = state.get('max_num_turns',2)
 
-    # Check the number of expert answers 
-    num_responses = len(
-        [m for m in messages if isinstance(m, AIMessage) and m.name == name]
-    )
+    # Number of expert answers, counted as they were given
+    num_responses = state.get('num_answers', 0)
 
     # End if expert has answered more than the max turns
     if num_responses >= max_num_turns:
@@ -302,7 +425,6 @@ Your task is to create a short, easily digestible section of a report based on a
 3. Write the report following this structure:
 a. Title (## header)
 b. Summary (### header)
-c. Sources (### header)
 
 4. Make your title engaging based upon the focus area of the analyst: 
 {focus}
@@ -310,69 +432,95 @@ c. Sources (### header)
 5. For the summary section:
 - Set up summary with general background / context related to the focus area of the analyst
 - Emphasize what is novel, interesting, or surprising about insights gathered from the interview
-- Create a numbered list of source documents, as you use them
 - Do not mention the names of interviewers or experts
 - Aim for approximately 400 words maximum
-- Use numbered sources in your report (e.g., [1], [2]) based on information from source documents
+- Cite source documents by the id in their <Document tag, in brackets (e.g., [S1a2b3c]), based on information from source documents
+- Do not add a list of sources; they are numbered and listed when the report is assembled
         
-6. In the Sources section:
-- Include all sources used in your report
-- Provide full links to relevant websites or specific document paths
-- Separate each source by a newline. Use two spaces at the end of each line to create a newline in Markdown.
-- It will look like:
-
-### Sources
-[1] Link or Document name
-[2] Link or Document name
-
-7. Be sure to combine sources. For example this is not correct:
-
-[3] https://ai.meta.com/blog/meta-llama-3-1/
-[4] https://ai.meta.com/blog/meta-llama-3-1/
-
-There should be no redundant sources. It should simply be:
-
-[3] https://ai.meta.com/blog/meta-llama-3-1/
-        
-8. Final review:
+6. Final review:
 - Ensure the report follows the required structure
 - Include no preamble before the title of the report
 - Check that all guidelines have been followed"""
 
-def write_section(state: InterviewState):
+def section_messages(state: InterviewState):
 
-    """ Node to write a section """
+    """ Prompt for writing a section """
 
     # Get state
     interview = state["interview"]
-    context = state["context"]
     analyst = state["analyst"]
+    context = select_context(state["context"], analyst.description, context_budgets["section"])
    
     # Write section using either the gathered source docs from interview (context) or the interview itself (interview)
     system_message = section_writer_instructions.format(focus=analyst.description)
-    section = llm.invoke([SystemMessage(content=system_message)]+[HumanMessage(content=f"Use this source to write your section: {context}")]) 
+    return [SystemMessage(content=system_message)]+[HumanMessage(content=f"Use this source to write your section: {context}")]
+
+def write_section(state: InterviewState):
+
+    """ Node to write a section """
+
+    section = llm.invoke(section_messages(state)) 
                 
     # Append it to state
     return {"sections": [section.content]}
 
-# Add nodes and edges 
-interview_builder = StateGraph(InterviewState)
-interview_builder.add_node("ask_question", generate_question)
-interview_builder.add_node("search_web", search_web)
-interview_builder.add_node("search_wikipedia", search_wikipedia)
-interview_builder.add_node("answer_question", generate_answer)
-interview_builder.add_node("save_interview", save_interview)
-interview_builder.add_node("write_section", write_section)
-
-# Flow
-interview_builder.add_edge(START, "ask_question")
-interview_builder.add_edge("ask_question", "search_web")
-interview_builder.add_edge("ask_question", "search_wikipedia")
-interview_builder.add_edge("search_web", "answer_question")
-interview_builder.add_edge("search_wikipedia", "answer_question")
-interview_builder.add_conditional_edges("answer_question", route_messages,['ask_question','save_interview'])
-interview_builder.add_edge("save_interview", "write_section")
-interview_builder.add_edge("write_section", END)
+async def awrite_section(state: InterviewState):
+
+    """ Node to write a section (async) """
+
+    section = await llm.ainvoke(section_messages(state))
+    return {"sections": [section.content]}
+
+def build_interview_graph(generate_question, plan_queries, search_web, search_wikipedia, generate_answer,
+                          write_section):
+
+    """ Wire the interview subgraph from its sync or async nodes, timing each step of a turn """
+
+    def timed(name, node):
+        return timed_node(scheduler_metrics, f"interview_turn:{name}", node)
+
+    # Add nodes and edges 
+    interview_builder = StateGraph(InterviewState)
+    interview_builder.add_node("ask_question", timed("ask_question", generate_question))
+    interview_builder.add_node("plan_queries", timed("plan_queries", plan_queries))
+    interview_builder.add_node("search_web", timed("search_web", search_web))
+    interview_builder.add_node("search_wikipedia", timed("search_wikipedia", search_wikipedia))
+    interview_builder.add_node("answer_question", timed("answer_question", generate_answer))
+    interview_builder.add_node("save_interview", save_interview)
+    interview_builder.add_node("write_section", write_section)
+
+    # Flow
+    interview_builder.add_edge(START, "ask_question")
+    interview_builder.add_edge("ask_question", "plan_queries")
+    interview_builder.add_edge("plan_queries", "search_web")
+    interview_builder.add_edge("plan_queries", "search_wikipedia")
+    interview_builder.add_edge("search_web", "answer_question")
+    interview_builder.add_edge("search_wikipedia", "answer_question")
+    interview_builder.add_conditional_edges("answer_question", route_messages,['ask_question','save_interview'])
+    interview_builder.add_edge("save_interview", "write_section")
+    interview_builder.add_edge("write_section", END)
+    return interview_builder.compile()
+
+interview_graph = build_interview_graph(generate_question, plan_queries, search_web, search_wikipedia, generate_answer,
+                                        write_section)
+async_interview_graph = build_interview_graph(agenerate_question, aplan_queries, asearch_web, asearch_wikipedia,
+                                              agenerate_answer, awrite_section)
+
+def conduct_interview(state: InterviewState, config: RunnableConfig):
+
+    """ Run one interview subgraph once the scheduler admits it """
+
+    with interview_scheduler.slot(priority=state.get("priority", 0)):
+        interview = interview_graph.invoke(state, config)
+    return {"sections": interview["sections"], "sources": interview.get("sources", {})}
+
+async def aconduct_interview(state: InterviewState, config: RunnableConfig):
+
+    """ Run one interview subgraph once the scheduler admits it (async) """
+
+    async with async_interview_scheduler.aslot(priority=state.get("priority", 0)):
+        interview = await async_interview_graph.ainvoke(state, config)
+    return {"sections": interview["sections"], "sources": interview.get("sources", {})}
 
 def initiate_all_interviews(state: ResearchGraphState):
 
@@ -391,10 +539,11 @@ def initiate_all_interviews(state: ResearchGraphState):
                                            "messages": [HumanMessage(
                                                content=f"So you said you were writing an article on {topic}?"
                                            )
-                                                       ]}) for analyst in state["analysts"]]
+                                                       ],
+                                           "priority": priority}) for priority, analyst in enumerate(state["analysts"])]
 
-# Write a report based on the interviews
-report_writer_instructions = """You are a technical writer creating a report on this overall topic: 
+# Prompt prefix of the report, introduction and conclusion writers
+writer_setup_instructions = """You are a technical writer creating a report on this overall topic: 
 
 {topic}
     
@@ -403,12 +552,56 @@ You have a team of analysts. Each analyst has done two things:
 1. They conducted an interview with an expert on a specific sub-topic.
 2. They write up their finding into a memo.
 
-Your task: 
+{memos}"""
+
+def digest_sections(state: ResearchGraphState):
+
+    """ Reduce the sections to a digest (title and lead of each) for the introduction and conclusion writers """
 
-1. You will be given a collection of memos from your analysts.
-2. Think carefully about the insights from each memo.
-3. Consolidate these into a crisp overall summary that ties together the central ideas from all of the memos. 
-4. Summarize the central points in each memo into a cohesive single narrative.
+    return {"digest": section_digest(tuple(state["sections"]))}
+
+def memo_messages(state: ResearchGraphState, instructions: str, request: str):
+
+    """ The full memos, for the report body writer, which consolidates them and keeps their citations """
+
+    memos = "Here are the memos from your analysts: \n\n" + "\n\n".join(state["sections"])
+    prefix = writer_setup_instructions.format(topic=state["topic"], memos=memos)
+    return [SystemMessage(content=prefix), SystemMessage(content=instructions), HumanMessage(content=request)]
+
+def digest_messages(state: ResearchGraphState, instructions: str, request: str):
+
+    """ The digest of the memos, for writers that only preview or recap them
+
+    The system messages are identical for the introduction and conclusion; the conclusion is written after the
+    introduction, so the provider's prompt cache can serve them to it.
+    """
+
+    memos = "Here is a digest of the memos from your analysts, one line per memo with its title and lead: \n\n" \
+        + state["digest"]
+    prefix = writer_setup_instructions.format(topic=state["topic"], memos=memos)
+    return [SystemMessage(content=prefix), SystemMessage(content=instructions), HumanMessage(content=request)]
+
+def record_tokens(name: str, state: ResearchGraphState, messages, response, follows_same_prefix: bool = False):
+
+    """ Account a writer's prompt tokens against sending it the full memos
+
+    Only a call made after another with the same system messages (the conclusion, after the introduction) counts
+    them as a shared prefix: calls that start together all miss the provider's prompt cache.
+    """
+
+    prompt = sum(count_tokens(message.content) for message in messages)
+    baseline = sum(count_tokens(message.content) for message in memo_messages(state, messages[1].content,
+                                                                               messages[2].content))
+    shared_prefix = sum(count_tokens(message.content) for message in messages[:2]) if follows_same_prefix else 0
+    cached = (response.usage_metadata or {}).get("input_token_details", {}).get("cache_read", 0)
+    token_ledger.record(name, prompt, baseline, shared_prefix=shared_prefix, cached=cached)
+
+# Write a report based on the interviews
+report_writer_instructions = """Your task: 
+
+1. Think carefully about the insights from each memo.
+2. Consolidate these into a crisp overall summary that ties together the central ideas from all of the memos. 
+3. Summarize the central points in each memo into a cohesive single narrative.
 
 To format your report:
  
@@ -417,37 +610,30 @@ To format your report:
 3. Use no sub-heading. 
 4. Start your report with a single title header: ## Insights
 5. Do not mention any analyst names in your report.
-6. Preserve any citations in the memos, which will be annotated in brackets, for example [1] or [2].
-7. Create a final, consolidated list of sources and add to a Sources section with the `## Sources` header.
-8. List your sources in order and do not repeat.
-
-[1] Source 1
-[2] Source 2
-
-Here are the memos from your analysts to build your report from: 
-
-{context}"""
+6. Preserve any citations in the memos, which are source ids in brackets, for example [S1a2b3c].
+7. Do not add a list of sources; the Sources section is assembled from the citations."""
 
 def write_report(state: ResearchGraphState):
 
     """ Node to write the final report body """
 
-    # Full set of sections
-    sections = state["sections"]
-    topic = state["topic"]
-
-    # Concat all sections together
-    formatted_str_sections = "\n\n".join([f"{section}" for section in sections])
-    
     # Summarize the sections into a final report
-    system_message = report_writer_instructions.format(topic=topic, context=formatted_str_sections)    
-    report = llm.invoke([SystemMessage(content=system_message)]+[HumanMessage(content=f"Write a report based upon these memos.")]) 
+    messages = memo_messages(state, report_writer_instructions, "Write a report based upon these memos.")
+    report = llm.invoke(messages) 
+    record_tokens("write_report", state, messages, report)
     return {"content": report.content}
 
-# Write the introduction or conclusion
-intro_conclusion_instructions = """You are a technical writer finishing a report on {topic}
+async def awrite_report(state: ResearchGraphState):
 
-You will be given all of the sections of the report.
+    """ Node to write the final report body (async) """
+
+    messages = memo_messages(state, report_writer_instructions, "Write a report based upon these memos.")
+    report = await llm.ainvoke(messages)
+    record_tokens("write_report", state, messages, report)
+    return {"content": report.content}
+
+# Write the introduction or conclusion
+intro_conclusion_instructions = """The memos are the sections of the report, which you are now finishing; the digest gives the title and lead of each.
 
 You job is to write a crisp and compelling introduction or conclusion section.
 
@@ -463,84 +649,90 @@ For your introduction, create a compelling title and use the # header for the ti
 
 For your introduction, use ## Introduction as the section header. 
 
-For your conclusion, use ## Conclusion as the section header.
-
-Here are the sections to reflect on for writing: {formatted_str_sections}"""
+For your conclusion, use ## Conclusion as the section header."""
 
 def write_introduction(state: ResearchGraphState):
 
     """ Node to write the introduction """
 
-    # Full set of sections
-    sections = state["sections"]
-    topic = state["topic"]
-
-    # Concat all sections together
-    formatted_str_sections = "\n\n".join([f"{section}" for section in sections])
-    
     # Summarize the sections into a final report
-    
-    instructions = intro_conclusion_instructions.format(topic=topic, formatted_str_sections=formatted_str_sections)    
-    intro = llm.invoke([instructions]+[HumanMessage(content=f"Write the report introduction")]) 
+    messages = digest_messages(state, intro_conclusion_instructions, "Write the report introduction")
+    intro = llm.invoke(messages) 
+    record_tokens("write_introduction", state, messages, intro)
+    return {"introduction": intro.content}
+
+async def awrite_introduction(state: ResearchGraphState):
+
+    """ Node to write the introduction (async) """
+
+    messages = digest_messages(state, intro_conclusion_instructions, "Write the report introduction")
+    intro = await llm.ainvoke(messages)
+    record_tokens("write_introduction", state, messages, intro)
     return {"introduction": intro.content}
 
 def write_conclusion(state: ResearchGraphState):
 
     """ Node to write the conclusion """
 
-    # Full set of sections
-    sections = state["sections"]
-    topic = state["topic"]
-
-    # Concat all sections together
-    formatted_str_sections = "\n\n".join([f"{section}" for section in sections])
-    
     # Summarize the sections into a final report
-    
-    instructions = intro_conclusion_instructions.format(topic=topic, formatted_str_sections=formatted_str_sections)    
-    conclusion = llm.invoke([instructions]+[HumanMessage(content=f"Write the report conclusion")]) 
+    messages = digest_messages(state, intro_conclusion_instructions, "Write the report conclusion")
+    conclusion = llm.invoke(messages) 
+    record_tokens("write_conclusion", state, messages, conclusion, follows_same_prefix=True)
+    return {"conclusion": conclusion.content}
+
+async def awrite_conclusion(state: ResearchGraphState):
+
+    """ Node to write the conclusion (async) """
+
+    messages = digest_messages(state, intro_conclusion_instructions, "Write the report conclusion")
+    conclusion = await llm.ainvoke(messages)
+    record_tokens("write_conclusion", state, messages, conclusion, follows_same_prefix=True)
     return {"conclusion": conclusion.content}
 
 def finalize_report(state: ResearchGraphState):
 
     """ The is the "reduce" step where we gather all the sections, combine them, and reflect on them to write the intro/conclusion """
 
-    # Save full final report
-    content = state["content"]
-    if content.startswith("## Insights"):
-        content = content.strip("## Insights")
-    if "## Sources" in content:
-        try:
-            content, sources = content.split("\n## Sources\n")
-        except:
-            sources = None
-    else:
-        sources = None
-
-    final_report = state["introduction"] + "\n\n---\n\n" + content + "\n\n---\n\n" + state["conclusion"]
-    if sources is not None:
-        final_report += "\n\n## Sources\n" + sources
+    # Save full final report, numbering the cited sources in order of first citation
+    content, _ = parse_report_body(state["content"])
+    (introduction, content, conclusion), sources = renumber(
+        [state["introduction"], content, state["conclusion"]], state.get("sources", {}))
+    final_report = assemble_report(introduction, content, conclusion, sources)
     return {"final_report": final_report}
 
-# Add nodes and edges 
-builder = StateGraph(ResearchGraphState)
-builder.add_node("create_analysts", create_analysts)
-builder.add_node("human_feedback", human_feedback)
-builder.add_node("conduct_interview", interview_builder.compile())
-builder.add_node("write_report",write_report)
-builder.add_node("write_introduction",write_introduction)
-builder.add_node("write_conclusion",write_conclusion)
-builder.add_node("finalize_report",finalize_report)
-
-# Logic
-builder.add_edge(START, "create_analysts")
-builder.add_edge("create_analysts", "human_feedback")
-builder.add_conditional_edges("human_feedback", initiate_all_interviews, ["create_analysts", "conduct_interview"])
-builder.add_edge("conduct_interview", "write_report")
-builder.add_edge("conduct_interview", "write_introduction")
-builder.add_edge("conduct_interview", "write_conclusion")
-builder.add_edge(["write_conclusion", "write_report", "write_introduction"], "finalize_report")
-builder.add_edge("finalize_report", END)
+def build_research_graph(create_analysts, conduct_interview, write_report, write_introduction, write_conclusion):
+
+    """ Wire the research graph from its sync or async nodes """
+
+    # Add nodes and edges 
+    builder = StateGraph(ResearchGraphState)
+    builder.add_node("create_analysts", create_analysts)
+    builder.add_node("human_feedback", human_feedback)
+    builder.add_node("conduct_interview", conduct_interview)
+    builder.add_node("digest_sections", digest_sections)
+    builder.add_node("write_report",write_report)
+    builder.add_node("write_introduction",write_introduction)
+    builder.add_node("write_conclusion",write_conclusion)
+    builder.add_node("finalize_report",finalize_report)
+
+    # Logic
+    builder.add_edge(START, "create_analysts")
+    builder.add_edge("create_analysts", "human_feedback")
+    builder.add_conditional_edges("human_feedback", initiate_all_interviews, ["create_analysts", "conduct_interview"])
+    builder.add_edge("conduct_interview", "digest_sections")
+    builder.add_edge("digest_sections", "write_report")
+    builder.add_edge("digest_sections", "write_introduction")
+    # After the introduction, whose identical system messages warm the provider's prompt cache for it
+    builder.add_edge("write_introduction", "write_conclusion")
+    builder.add_edge(["write_conclusion", "write_report"], "finalize_report")
+    builder.add_edge("finalize_report", END)
+    return builder
+
+builder = build_research_graph(create_analysts, conduct_interview, write_report, write_introduction, write_conclusion)
+# Same graph with every LLM, search and subgraph call awaited, so one event loop can drive many runs
+async_builder = build_research_graph(acreate_analysts, aconduct_interview, awrite_report, awrite_introduction,
+                                     awrite_conclusion)
 
 # Compile
-graph = builder.compile(interrupt_before=['human_feedback'])
\ No newline at end of file
+graph = builder.compile(interrupt_before=['human_feedback'])
+async_graph = async_builder.compile(interrupt_before=['human_feedback'])
\ No newline at end of file
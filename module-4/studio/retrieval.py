@@ -0,0 +1,236 @@
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Optional
+
+from langchain_core.documents import Document
+
+
+def normalize_query(query: str) -> str:
+    """ Case-fold, collapse whitespace and trim quotes/punctuation so equivalent queries share results """
+    return re.sub(r"\s+", " ", query.casefold()).strip(" \t\n\"'?.!")
+
+
+class LiveBackend:
+    """ Tavily web search and Wikipedia, with one search client reused for every call
+
+    Optional rate limiters (BaseRateLimiter) are acquired before each request to the provider.
+    """
+
+    def __init__(self, web_max_results: int = 3, wiki_max_docs: int = 2, web_rate_limiter=None,
+                 wiki_rate_limiter=None):
+        self.web_max_results = web_max_results
+        self.wiki_max_docs = wiki_max_docs
+        self.web_rate_limiter = web_rate_limiter
+        self.wiki_rate_limiter = wiki_rate_limiter
+        self._tavily = None
+
+    def search_web(self, query: str) -> list:
+        if self.web_rate_limiter is not None:
+            self.web_rate_limiter.acquire()
+        if self._tavily is None:
+            from langchain_community.tools.tavily_search import TavilySearchResults
+            self._tavily = TavilySearchResults(max_results=self.web_max_results)
+        return self._tavily.invoke(query)
+
+    def search_wikipedia(self, query: str) -> list:
+        if self.wiki_rate_limiter is not None:
+            self.wiki_rate_limiter.acquire()
+        from langchain_community.document_loaders import WikipediaLoader
+        return WikipediaLoader(query=query, load_max_docs=self.wiki_max_docs).load()
+
+    async def asearch_web(self, query: str) -> list:
+        if self.web_rate_limiter is not None:
+            await self.web_rate_limiter.aacquire()
+        if self._tavily is None:
+            from langchain_community.tools.tavily_search import TavilySearchResults
+            self._tavily = TavilySearchResults(max_results=self.web_max_results)
+        return await self._tavily.ainvoke(query)
+
+    async def asearch_wikipedia(self, query: str) -> list:
+        if self.wiki_rate_limiter is not None:
+            await self.wiki_rate_limiter.aacquire()
+        # The wikipedia client has no async API, so it runs on a worker thread
+        from langchain_community.document_loaders import WikipediaLoader
+        return await asyncio.to_thread(WikipediaLoader(query=query, load_max_docs=self.wiki_max_docs).load)
+
+
+class FixtureBackend:
+    """ Offline results from a JSON file, for tests and benchmarks
+
+    The file maps "web" and "wikipedia" to {normalized query: [documents]}, where web documents are
+    {"url", "content"} and Wikipedia documents {"source", "page", "content"}. Queries that are not in
+    the file get one synthetic document, so graphs run end to end without network access.
+    """
+
+    def __init__(self, path: Optional[str] = None, latency: float = 0.0):
+        self.latency = latency
+        self.fixtures = {"web": {}, "wikipedia": {}}
+        if path:
+            with open(path) as f:
+                self.fixtures.update(json.load(f))
+        self.calls = 0
+
+    def _lookup(self, source: str, query: str) -> list:
+        self.calls += 1
+        return self.fixtures[source].get(normalize_query(query))
+
+    def search_web(self, query: str) -> list:
+        time.sleep(self.latency)
+        return self._web_docs(query, self._lookup("web", query))
+
+    def search_wikipedia(self, query: str) -> list:
+        time.sleep(self.latency)
+        return self._wiki_docs(query, self._lookup("wikipedia", query))
+
+    async def asearch_web(self, query: str) -> list:
+        await asyncio.sleep(self.latency)
+        return self._web_docs(query, self._lookup("web", query))
+
+    async def asearch_wikipedia(self, query: str) -> list:
+        await asyncio.sleep(self.latency)
+        return self._wiki_docs(query, self._lookup("wikipedia", query))
+
+    def _web_docs(self, query, docs):
+        if docs is None:
+            slug = re.sub(r"\W+", "-", normalize_query(query))
+            docs = [{"url": f"https://example.com/{slug}", "content": f"Offline result for: {query}"}]
+        return docs
+
+    def _wiki_docs(self, query, docs):
+        if docs is None:
+            docs = [{"source": f"https://en.wikipedia.org/wiki/{query.replace(' ', '_')}", "page": "",
+                     "content": f"Offline article for: {query}"}]
+        return [Document(page_content=doc["content"], metadata={"source": doc["source"], "page": doc.get("page", "")})
+                for doc in docs]
+
+
+class SearchError(RuntimeError):
+    """ A search provider returned something other than a list of results """
+
+
+def _checked(source: str, query: str, docs):
+    # TavilySearchResults returns repr(error) as a string when the provider fails
+    if not isinstance(docs, list):
+        raise SearchError(f"{source} search for {query!r} failed: {docs}")
+    return docs
+
+
+class RetrievalService:
+    """ Search shared by every interview branch
+
+    Results are cached by normalized query for `ttl` seconds, and concurrent requests for the same
+    query (e.g. parallel Send("conduct_interview") branches on overlapping sub-topics) wait on the
+    one request already in flight instead of issuing their own. Only lists of results are cached;
+    anything else a provider returns is raised to every waiter as a SearchError.
+    """
+
+    def __init__(self, backend, ttl: float = 3600.0, max_entries: int = 1024):
+        self.backend = backend
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._cache = OrderedDict()  # (source, normalized query) -> (docs, stored_at)
+        self._in_flight = {}  # (source, normalized query) -> Future
+        self._lock = threading.Lock()
+
+    def search_web(self, query: str) -> list:
+        """ Web results as [{"url", "content"}] """
+        return self._search("web", query, self.backend.search_web)
+
+    def search_wikipedia(self, query: str) -> list:
+        """ Wikipedia results as Documents with "source" and "page" metadata """
+        return self._search("wikipedia", query, self.backend.search_wikipedia)
+
+    async def asearch_web(self, query: str) -> list:
+        return await self._asearch("web", query, self.backend.asearch_web)
+
+    async def asearch_wikipedia(self, query: str) -> list:
+        return await self._asearch("wikipedia", query, self.backend.asearch_wikipedia)
+
+    def _search(self, source, query, fetch):
+        key = (source, normalize_query(query))
+        docs, future, leader = self._claim(key)
+        if docs is not None:
+            return docs
+        if not leader:
+            return future.result()
+        try:
+            docs = _checked(source, query, fetch(query))
+        except BaseException as e:
+            self._fail(key, future, e)
+            raise
+        self._publish(key, future, docs)
+        return docs
+
+    async def _asearch(self, source, query, fetch):
+        # Shares the cache and in-flight futures with sync callers; followers await the leader's future
+        key = (source, normalize_query(query))
+        docs, future, leader = self._claim(key)
+        if docs is not None:
+            return docs
+        if not leader:
+            return await asyncio.wrap_future(future)
+        try:
+            docs = _checked(source, query, await fetch(query))
+        except BaseException as e:
+            self._fail(key, future, e)
+            raise
+        self._publish(key, future, docs)
+        return docs
+
+    def _claim(self, key):
+        """ Return (cached docs, None, False), (None, in-flight future, False) or (None, new future, True) """
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and time.monotonic() - entry[1] <= self.ttl:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return entry[0], None, False
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return None, future, False
+            future = self._in_flight[key] = Future()
+            self.misses += 1
+            return None, future, True
+
+    def _fail(self, key, future, error):
+        with self._lock:
+            self._in_flight.pop(key, None)
+        future.set_exception(error)
+
+    def _publish(self, key, future, docs):
+        with self._lock:
+            self._in_flight.pop(key, None)
+            self._cache[key] = (docs, time.monotonic())
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        future.set_result(docs)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "coalesced": self.coalesced, "entries": len(self._cache)}
+
+
+def retrieval_service_from_env(rate_limiters: Optional[dict] = None) -> RetrievalService:
+    """ Build the service from the environment, limiting live requests with rate_limiters["tavily"/"wikipedia"]:
+
+    RETRIEVAL_BACKEND: live (default) or fixture
+    RETRIEVAL_FIXTURES: JSON file for the fixture backend, optional
+    RETRIEVAL_CACHE_TTL: seconds results are reused, default 3600
+    """
+    ttl = float(os.environ.get("RETRIEVAL_CACHE_TTL", "3600"))
+    if os.environ.get("RETRIEVAL_BACKEND", "live").lower() == "fixture":
+        return RetrievalService(FixtureBackend(os.environ.get("RETRIEVAL_FIXTURES")), ttl=ttl)
+    rate_limiters = rate_limiters or {}
+    backend = LiveBackend(web_rate_limiter=rate_limiters.get("tavily"),
+                          wiki_rate_limiter=rate_limiters.get("wikipedia"))
+    return RetrievalService(backend, ttl=ttl)
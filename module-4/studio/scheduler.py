@@ -0,0 +1,230 @@
+import asyncio
+import functools
+import heapq
+import inspect
+import itertools
+import os
+import random
+import statistics
+import threading
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager, contextmanager
+from typing import Optional
+
+from langchain_core.rate_limiters import InMemoryRateLimiter
+
+# Providers that get a token bucket when RATE_LIMIT_<PROVIDER> is set
+PROVIDERS = ("openai", "tavily", "wikipedia")
+
+
+# Durations kept per name for percentiles; counts, totals and maxima stay exact
+RESERVOIR_SIZE = 1024
+
+
+class _Series:
+    """ Running count/total/max of one duration, plus a uniform reservoir sample of its values """
+
+    __slots__ = ("count", "total", "max", "sample")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.sample = []
+
+
+class SchedulerMetrics:
+    """ Queue-wait and execution durations, by name
+
+    Memory per name is bounded by `reservoir_size`: percentiles come from a reservoir sample
+    (algorithm R), so a long-running server does not accumulate every duration it ever recorded.
+    """
+
+    def __init__(self, reservoir_size: int = RESERVOIR_SIZE):
+        self.reservoir_size = reservoir_size
+        self._series = defaultdict(_Series)
+        self._random = random.Random(0)
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float) -> None:
+        with self._lock:
+            series = self._series[name]
+            series.count += 1
+            series.total += seconds
+            series.max = max(series.max, seconds)
+            if len(series.sample) < self.reservoir_size:
+                series.sample.append(seconds)
+            else:
+                slot = self._random.randrange(series.count)
+                if slot < self.reservoir_size:
+                    series.sample[slot] = seconds
+
+    def summary(self) -> dict:
+        """ {name: {count, total_s, p50_ms, p95_ms, max_ms}} """
+        with self._lock:
+            series = {name: (s.count, s.total, s.max, sorted(s.sample)) for name, s in self._series.items()}
+        return {
+            name: {
+                "count": count,
+                "total_s": total,
+                "p50_ms": statistics.median(sample) * 1000,
+                "p95_ms": sample[min(len(sample) - 1, int(0.95 * len(sample)))] * 1000,
+                "max_ms": maximum * 1000,
+            }
+            for name, (count, total, maximum, sample) in series.items()
+        }
+
+
+class MeteredRateLimiter(InMemoryRateLimiter):
+    """ Token bucket (LangChain's InMemoryRateLimiter) that records how long callers waited for a token """
+
+    def __init__(self, name: str, metrics: SchedulerMetrics, **kwargs):
+        super().__init__(**kwargs)
+        self.name = name
+        self.metrics = metrics
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        started = time.monotonic()
+        acquired = super().acquire(blocking=blocking)
+        self.metrics.record(f"rate_limit_wait:{self.name}", time.monotonic() - started)
+        return acquired
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        started = time.monotonic()
+        acquired = await super().aacquire(blocking=blocking)
+        self.metrics.record(f"rate_limit_wait:{self.name}", time.monotonic() - started)
+        return acquired
+
+
+class InterviewScheduler:
+    """ Admits at most `max_in_flight` interviews at a time, lowest priority value first
+
+    Interviews that arrive together (one Send() per analyst) queue instead of all starting at once;
+    ties keep arrival order. Time spent queued and time spent running are recorded separately.
+    """
+
+    def __init__(self, max_in_flight: int = 3, metrics: Optional[SchedulerMetrics] = None):
+        self.max_in_flight = max_in_flight
+        self.metrics = metrics or SchedulerMetrics()
+        self._running = 0
+        self._queue = []  # heap of (priority, arrival)
+        self._arrivals = itertools.count()
+        self._cond = threading.Condition()
+
+    def _withdraw(self, ticket):
+        """ Remove a waiter that gave up from the queue (called with the condition held) """
+        self._queue.remove(ticket)
+        heapq.heapify(self._queue)
+
+    @contextmanager
+    def slot(self, priority: int = 0):
+        """ Block until this caller may run, then hold a slot for the duration of the block """
+        ticket = (priority, next(self._arrivals))
+        enqueued = time.monotonic()
+        with self._cond:
+            heapq.heappush(self._queue, ticket)
+            try:
+                while self._queue[0] != ticket or self._running >= self.max_in_flight:
+                    self._cond.wait()
+            except BaseException:
+                self._withdraw(ticket)
+                self._cond.notify_all()
+                raise
+            heapq.heappop(self._queue)
+            self._running += 1
+            # The next in line may also fit
+            self._cond.notify_all()
+        started = time.monotonic()
+        self.metrics.record("interview_queue_wait", started - enqueued)
+        try:
+            yield
+        finally:
+            self.metrics.record("interview_exec", time.monotonic() - started)
+            with self._cond:
+                self._running -= 1
+                self._cond.notify_all()
+
+
+class AsyncInterviewScheduler(InterviewScheduler):
+    """ InterviewScheduler for coroutines: queued interviews wait on the event loop, not on a thread """
+
+    def __init__(self, max_in_flight: int = 3, metrics: Optional[SchedulerMetrics] = None):
+        super().__init__(max_in_flight, metrics)
+        self._async_cond = None
+        self._async_loop = None
+
+    @asynccontextmanager
+    async def aslot(self, priority: int = 0):
+        """ Wait until this coroutine may run, then hold a slot for the duration of the block """
+        loop = asyncio.get_running_loop()
+        if self._async_loop is not loop:
+            # asyncio primitives belong to one event loop
+            self._async_cond = asyncio.Condition()
+            self._async_loop = loop
+        ticket = (priority, next(self._arrivals))
+        enqueued = time.monotonic()
+        async with self._async_cond:
+            heapq.heappush(self._queue, ticket)
+            try:
+                await self._async_cond.wait_for(
+                    lambda: self._queue[0] == ticket and self._running < self.max_in_flight)
+            except BaseException:
+                # Cancelled while queued: a ticket left at the head would block every later interview
+                self._withdraw(ticket)
+                self._async_cond.notify_all()
+                raise
+            heapq.heappop(self._queue)
+            self._running += 1
+            self._async_cond.notify_all()
+        started = time.monotonic()
+        self.metrics.record("interview_queue_wait", started - enqueued)
+        try:
+            yield
+        finally:
+            self.metrics.record("interview_exec", time.monotonic() - started)
+            async with self._async_cond:
+                self._running -= 1
+                self._async_cond.notify_all()
+
+
+def timed_node(metrics: SchedulerMetrics, name: str, node):
+    """ Wrap a sync or async graph node so each call records its duration under `name` """
+    if inspect.iscoroutinefunction(node):
+        @functools.wraps(node)
+        async def timed(*args, **kwargs):
+            started = time.monotonic()
+            try:
+                return await node(*args, **kwargs)
+            finally:
+                metrics.record(name, time.monotonic() - started)
+    else:
+        @functools.wraps(node)
+        def timed(*args, **kwargs):
+            started = time.monotonic()
+            try:
+                return node(*args, **kwargs)
+            finally:
+                metrics.record(name, time.monotonic() - started)
+    return timed
+
+
+def rate_limiters_from_env(metrics: SchedulerMetrics) -> dict:
+    """ Token buckets per provider: RATE_LIMIT_<PROVIDER> requests/second, RATE_LIMIT_<PROVIDER>_BURST bucket size """
+    limiters = {}
+    for provider in PROVIDERS:
+        rate = os.environ.get(f"RATE_LIMIT_{provider.upper()}")
+        if not rate:
+            limiters[provider] = None
+            continue
+        rate = float(rate)
+        burst = float(os.environ.get(f"RATE_LIMIT_{provider.upper()}_BURST", max(1.0, rate)))
+        limiters[provider] = MeteredRateLimiter(provider, metrics, requests_per_second=rate,
+                                                check_every_n_seconds=min(0.1, 1 / rate), max_bucket_size=burst)
+    return limiters
+
+
+def interview_scheduler_from_env(metrics: SchedulerMetrics, asynchronous: bool = False) -> InterviewScheduler:
+    """ INTERVIEW_MAX_IN_FLIGHT: interviews run at once, default 3 """
+    scheduler_class = AsyncInterviewScheduler if asynchronous else InterviewScheduler
+    return scheduler_class(int(os.environ.get("INTERVIEW_MAX_IN_FLIGHT", "3")), metrics)
@@ -0,0 +1,47 @@
+import hashlib
+import re
+
+# Citations as written by the LLM: one or more source ids in brackets, e.g. [S1a2b3c] or [S1a2b3c, S4d5e6f]
+CITATION = re.compile(r"\[\s*(S[0-9a-f]{6}(?:\s*[,;]\s*S[0-9a-f]{6})*)\s*\]")
+_ID = re.compile(r"S[0-9a-f]{6}")
+
+
+def source_id(source: str, page: str = "") -> str:
+    """ Stable id for a source: the same URL (and page) gets the same id in every interview and run """
+    return "S" + hashlib.sha1(f"{source}#{page}".encode()).hexdigest()[:6]
+
+
+def register(docs: list) -> dict:
+    """ Registry entries {id: {"source", "page"}} for context documents """
+    return {doc["id"]: {"source": doc["source"], "page": doc["page"]} for doc in docs}
+
+
+def merge_sources(existing: dict, new: dict) -> dict:
+    """ Reducer for the source registry: union of entries, ids being stable per source """
+    return {**(existing or {}), **(new or {})}
+
+
+def format_source(entry: dict) -> str:
+    return f'{entry["source"]}, page {entry["page"]}' if entry["page"] else entry["source"]
+
+
+def renumber(texts: list, registry: dict) -> tuple:
+    """ Replace source ids with [1], [2], ... in order of first citation across `texts`
+
+    Returns (texts, sources) where sources is the numbered list for the Sources section. Ids that are
+    not in the registry (i.e. not from any retrieved document) are dropped from the text.
+    """
+    numbers = {}
+    for text in texts:
+        for group in CITATION.finditer(text):
+            for cited in _ID.findall(group.group(1)):
+                if cited in registry and cited not in numbers:
+                    numbers[cited] = len(numbers) + 1
+
+    def replace(match):
+        cited = sorted({numbers[i] for i in _ID.findall(match.group(1)) if i in numbers})
+        return "".join(f"[{n}]" for n in cited)
+
+    texts = [CITATION.sub(replace, text) for text in texts]
+    sources = [f"[{n}] {format_source(registry[cited])}" for cited, n in numbers.items()]
+    return texts, sources
@@ -0,0 +1,46 @@
+from langchain_core.load import dumps
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_openai import ChatOpenAI
+from pydantic import BaseModel
+
+from llm_cache import InMemoryBackend, LLMResponseCache, cache_key
+
+
+class Answer(BaseModel):
+    x: int
+
+
+class RecordedChatOpenAI(ChatOpenAI):
+    """ ChatOpenAI answering like the json_schema structured-output API does, without a network call """
+
+    calls: int = 0
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        message = AIMessage('{"x": 1}', additional_kwargs={"parsed": Answer(x=1)})
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def test_structured_output_cache_hit():
+    cache = LLMResponseCache(InMemoryBackend())
+    llm = RecordedChatOpenAI(model="gpt-4o", api_key="test", cache=cache)
+    structured = llm.with_structured_output(Answer)
+
+    assert structured.invoke([HumanMessage("x?")]) == Answer(x=1)
+    assert structured.invoke([HumanMessage("x?")]) == Answer(x=1)
+    assert llm.calls == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_message_ids_are_ignored_but_tool_args_are_not():
+    def prompt(message_id, call_id, args):
+        return dumps([AIMessage("", id=message_id, tool_calls=[{"name": "lookup", "args": args, "id": call_id}])])
+
+    key = cache_key(prompt("run-1", "call_1", {"id": 7}), "llm")
+    assert key == cache_key(prompt("run-2", "call_2", {"id": 7}), "llm")
+    assert key != cache_key(prompt("run-1", "call_1", {"id": 8}), "llm")
+
+
+def test_message_types_are_part_of_the_key():
+    assert cache_key(dumps([HumanMessage("hi")]), "llm") != cache_key(dumps([AIMessage("hi")]), "llm")
@@ -0,0 +1,55 @@
+import threading
+import time
+
+import pytest
+
+from retrieval import RetrievalService, SearchError
+
+
+class FailingBackend:
+    """ Returns what TavilySearchResults returns on a provider error (a string), once released """
+
+    def __init__(self):
+        self.calls = 0
+        self.release = threading.Event()
+
+    def search_web(self, query):
+        self.calls += 1
+        self.release.wait(timeout=5)
+        return "HTTPError('429 Too Many Requests')"
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_provider_error_reaches_coalesced_waiters_and_is_not_cached():
+    backend = FailingBackend()
+    service = RetrievalService(backend)
+    errors = []
+
+    def search():
+        try:
+            service.search_web("llm agents")
+        except SearchError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=search)
+    leader.start()
+    wait_until(lambda: backend.calls == 1)
+    follower = threading.Thread(target=search)
+    follower.start()
+    wait_until(lambda: service.coalesced == 1)
+    backend.release.set()
+    leader.join()
+    follower.join()
+
+    assert len(errors) == 2
+    assert service.stats()["entries"] == 0
+    # The next search asks the provider again instead of replaying the error
+    with pytest.raises(SearchError):
+        service.search_web("llm agents")
+    assert backend.calls == 2
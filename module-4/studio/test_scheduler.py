@@ -0,0 +1,59 @@
+import asyncio
+import threading
+
+import pytest
+
+from scheduler import AsyncInterviewScheduler, InterviewScheduler
+
+
+def test_cancelled_waiter_does_not_block_later_interviews():
+    async def scenario():
+        scheduler = AsyncInterviewScheduler(max_in_flight=1)
+        release = asyncio.Event()
+        admitted = []
+
+        async def interview(name, hold=None):
+            async with scheduler.aslot():
+                admitted.append(name)
+                if hold is not None:
+                    await hold.wait()
+
+        running = asyncio.create_task(interview("running", release))
+        await asyncio.sleep(0)
+        queued = asyncio.create_task(interview("cancelled"))
+        await asyncio.sleep(0)
+        queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+        later = asyncio.create_task(interview("later"))
+        await asyncio.sleep(0)
+
+        release.set()
+        await running
+        await asyncio.wait_for(later, timeout=1)
+        return admitted, scheduler._queue
+
+    admitted, queue = asyncio.run(scenario())
+    assert admitted == ["running", "later"]
+    assert queue == []
+
+
+def test_interrupted_waiter_does_not_block_later_interviews():
+    scheduler = InterviewScheduler(max_in_flight=1)
+
+    def interrupted_wait(timeout=None):
+        raise KeyboardInterrupt
+
+    with scheduler.slot():
+        wait, scheduler._cond.wait = scheduler._cond.wait, interrupted_wait
+        with pytest.raises(KeyboardInterrupt):
+            with scheduler.slot():
+                pass
+        scheduler._cond.wait = wait
+
+    later = threading.Thread(target=lambda: scheduler.slot().__enter__(), daemon=True)
+    later.start()
+    later.join(timeout=1)
+    assert not later.is_alive()
+    assert scheduler._queue == []
+